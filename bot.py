@@ -6,21 +6,24 @@ import signal
 import asyncio
 import django
 
-from aiogram import Bot, Dispatcher, types
+from aiogram import Bot, Dispatcher, BaseMiddleware, types
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 from aiogram.filters import Command
 from aiogram.types import (
     ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup,
     InlineKeyboardButton, ReplyKeyboardRemove
 )
 from aiogram import F
-from asgiref.sync import sync_to_async
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 django.setup()
 
 from django.utils import timezone
 import pytz
-from store.models import TelegramAuth, Order, PaymentSettings
+from store import bot_repository as repo
 from django.core.cache import cache
 from django.conf import settings
 
@@ -37,20 +40,6 @@ logger = logging.getLogger(__name__)
 logger.info("Bot started")
 
 
-# --- Admin ID olish (sinxron yordamchi va async o'ram) ---
-def _get_admin_chat_id_sync():
-    """Sinxron funk: PaymentSettings dan admin_chat_id ni qaytaradi yoki None."""
-    settings_obj = PaymentSettings.objects.first()
-    return settings_obj.admin_chat_id if settings_obj else None
-
-async def get_admin_chat_id():
-    """
-    Async wrapper: bazadan admin_id ni har safar olish uchun ishlatiladi.
-    sync_to_async orqali chaqiriladi, shuning uchun event-loop bloklanmaydi.
-    """
-    return await sync_to_async(_get_admin_chat_id_sync)()
-
-
 # Konfiguratsiya
 API_TOKEN = settings.TELEGRAM_BOT_TOKEN
 
@@ -58,9 +47,27 @@ if not API_TOKEN:
     logger.error("TELEGRAM_BOT_TOKEN not found in settings")
     sys.exit(1)
 
-bot = Bot(token=API_TOKEN)
+if settings.TELEGRAM_API_BASE_URL:
+    # Lokal test: so'rovlar Telegram o'rniga stub serverga yuboriladi
+    bot = Bot(token=API_TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(settings.TELEGRAM_API_BASE_URL)))
+else:
+    bot = Bot(token=API_TOKEN)
 dp = Dispatcher()
 
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """Bir vaqtda qayta ishlanadigan update lar sonini cheklaydi (DB ulanishlarini asrash uchun)"""
+
+    def __init__(self, limit):
+        self.semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(self, handler, event, data):
+        async with self.semaphore:
+            return await handler(event, data)
+
+
+dp.update.outer_middleware(ConcurrencyLimitMiddleware(settings.TELEGRAM_BOT_CONCURRENCY))
+
 # Graceful shutdown uchun
 shutdown_event = asyncio.Event()
 
@@ -95,26 +102,21 @@ async def start(message: types.Message):
 
         session_token = args
 
-        # Database operatsiyasi
+        # Database operatsiyasi: muddati o'tgan sessiya yangilanmaydi
         try:
-            auth = await sync_to_async(TelegramAuth.objects.get)(
-                session_token=session_token,
-                # is_used=False
-            )
+            status = await repo.attach_chat_to_session(session_token, chat_id)
 
-            auth.chat_id = chat_id
-            await sync_to_async(auth.save)()
-
-            if await sync_to_async(lambda: auth.is_expired)():
+            if status == repo.SESSION_EXPIRED:
                 await message.answer("Sessiya muddati o'tgan. Iltimos, saytdan qayta urinib ko'ring.")
                 return
 
+            if status == repo.SESSION_NOT_FOUND:
+                logger.warning(f"Session not found for token: {session_token}")
+                await message.answer("Sessiya topilmadi. Iltimos, saytdan boshlang.")
+                return
+
             logger.info(f"Session found and updated for chat_id: {chat_id}")
 
-        except TelegramAuth.DoesNotExist:
-            logger.warning(f"Session not found for token: {session_token}")
-            await message.answer("Sessiya topilmadi. Iltimos, saytdan boshlang.")
-            return
         except Exception as e:
             logger.error(f"Database error in start command: {e}")
             await message.answer("Xatolik yuz berdi. Iltimos, qayta urinib ko'ring.")
@@ -139,25 +141,15 @@ async def handle_contact(message: types.Message):
         phone = message.contact.phone_number
         chat_id = message.chat.id
 
-        logger.info(f"[DEBUG] Contact received from chat_id: {chat_id}, phone: {phone}")
+        logger.info(f"Contact received from chat_id: {chat_id}")
 
         try:
-            pending = await sync_to_async(
-                lambda: TelegramAuth.objects.filter(
-                    chat_id=chat_id,
-                    phone_number__isnull=True,
-                    # is_used=False,
-                    created_at__gte=timezone.now() - timezone.timedelta(minutes=10)
-                ).order_by('-created_at').first()
-            )()
+            pending = await repo.get_session_awaiting_contact(chat_id)
 
             if not pending:
                 await message.answer("Faol sessiya topilmadi. Iltimos, saytdan qayta boshlang.")
                 return
 
-            # DEBUG: Boshlang'ich holat
-            logger.info(f"[DEBUG-1] BEFORE any changes: is_used={pending.is_used}")
-
         except Exception as e:
             logger.error(f"Database error in handle_contact: {e}")
             return
@@ -166,30 +158,8 @@ async def handle_contact(message: types.Message):
         code = str(random.randint(1000, 9999))
         login_url = f"{settings.SITE_URL}/auth/telegram/callback/?token={pending.session_token}&code={code}"
 
-        # DEBUG: Field o'zgartirishdan oldin
-        logger.info(f"[DEBUG-2] BEFORE field updates: is_used={pending.is_used}")
-
-        # Field larni o'zgartirish
-        pending.phone_number = phone
-        pending.code = code
-        pending.expires_at = timezone.now() + timezone.timedelta(minutes=2)
-
-        # DEBUG: Field o'zgartirishdan keyin, save qilishdan oldin
-        logger.info(f"[DEBUG-3] AFTER field updates, BEFORE save: is_used={pending.is_used}")
-
-        # Aniq False qilib qo'yish
-        pending.is_used = False
-        logger.info(f"[DEBUG-4] EXPLICITLY set False, BEFORE save: is_used={pending.is_used}")
-
-        # SAVE
-        await sync_to_async(pending.save)()
-
-        # DEBUG: Save qilishdan keyin
-        logger.info(f"[DEBUG-5] IMMEDIATELY after save: is_used={pending.is_used}")
-
-        # Fresh object yuklash
-        fresh_pending = await sync_to_async(TelegramAuth.objects.get)(id=pending.id)
-        logger.info(f"[DEBUG-6] FRESH from database: is_used={fresh_pending.is_used}")
+        # Telefon, kod, muddat va is_used=False bitta UPDATE da yoziladi
+        await repo.set_login_code(pending.pk, code, phone_number=phone)
 
         logger.info(f"Code generated for session: {pending.session_token}")
 
@@ -217,14 +187,7 @@ async def retry_code(callback: types.CallbackQuery):
         logger.info(f"Retry code requested by chat_id: {chat_id}")
 
         try:
-            pending = await sync_to_async(
-                lambda: TelegramAuth.objects.filter(
-                    chat_id=chat_id,
-                    phone_number__isnull=False,
-                    # is_used=False,
-                    created_at__gte=timezone.now() - timezone.timedelta(minutes=10)
-                ).order_by('-created_at').first()
-            )()
+            pending = await repo.get_session_with_contact(chat_id)
 
             if not pending:
                 await callback.message.edit_text("Faol sessiya topilmadi. Iltimos, saytdan qayta boshlang.")
@@ -246,9 +209,7 @@ async def retry_code(callback: types.CallbackQuery):
 
         import random
         new_code = str(random.randint(1000, 9999))
-        pending.code = new_code
-        pending.expires_at = timezone.now() + timezone.timedelta(minutes=2)
-        await sync_to_async(pending.save)()
+        await repo.set_login_code(pending.pk, new_code)
 
         cache.set(cache_key, attempts + 1, 300)  # 5 daqiqa
 
@@ -280,7 +241,7 @@ async def handle_order_callback(callback: types.CallbackQuery):
         logger.info(f"Order callback received: {callback_data} from user_id: {user_id}, chat_id: {chat_id}")
 
         # Har safar bazadan olib kelinadi (async)
-        current_admin_id = await get_admin_chat_id()
+        current_admin_id = await repo.get_admin_chat_id()
 
         is_admin = False
         if current_admin_id is not None:
@@ -295,20 +256,18 @@ async def handle_order_callback(callback: types.CallbackQuery):
             return
 
         try:
-            order = await sync_to_async(Order.objects.get)(order_id=order_id)
-        except Order.DoesNotExist:
-            await callback.answer("❌ Buyurtma topilmadi.")
-            return
+            # Buyurtma va mijozning telegram chat ID si bitta so'rovda
+            order_found, user_chat_id = await repo.get_order_customer_chat_id(order_id)
         except Exception as e:
             logger.error(f"Database error getting order: {e}")
             await callback.answer("❌ Ma'lumotlar bazasida xatolik yuz berdi.")
             return
 
-        try:
-            user_profile = await sync_to_async(lambda: order.user.userprofile)()
-            user_chat_id = user_profile.telegram_chat_id
-        except Exception:
-            user_chat_id = None
+        if not order_found:
+            await callback.answer("❌ Buyurtma topilmadi.")
+            return
+
+        if user_chat_id is None:
             # Agar admin_id bo'lsa, xabar yuboramiz
             if current_admin_id:
                 try:
@@ -325,9 +284,7 @@ async def handle_order_callback(callback: types.CallbackQuery):
                 await callback.answer("✅ To'lov tasdiqlandi!")
 
                 # Ma'lumotlar bazasini yangilash
-                order.payment_confirmed = True
-                order.payment_confirmed_at = timezone.now()
-                await sync_to_async(order.save)()
+                await repo.confirm_order_payment(order_id)
 
                 logger.info(f"Order {order_id} payment confirmed by user {user_id}")
 
@@ -374,6 +331,7 @@ async def handle_order_callback(callback: types.CallbackQuery):
                 # Avval callback answer berish
                 await callback.answer("❌ To'lov bekor qilindi!")
 
+                await repo.record_payment_cancelled(order_id)
                 logger.info(f"Order {order_id} payment cancelled by user {user_id}")
 
                 # Foydalanuvchiga xabar yuborish
@@ -424,7 +382,7 @@ async def handle_order_callback(callback: types.CallbackQuery):
 
         # Admin uchun batafsil xabar — faqat agar admin_id mavjud bo'lsa
         try:
-            current_admin_id = await get_admin_chat_id()
+            current_admin_id = await repo.get_admin_chat_id()
             if current_admin_id:
                 await bot.send_message(
                     int(current_admin_id),
@@ -437,16 +395,62 @@ async def handle_order_callback(callback: types.CallbackQuery):
             logger.error(f"Failed to send admin error report: {ex}")
 
 
+async def run_polling():
+    # Webhook o'rnatilgan bo'lsa getUpdates ishlamaydi
+    await bot.delete_webhook()
+    await dp.start_polling(bot, handle_signals=False)
+
+
+def create_webhook_app():
+    """aiohttp ilovasi: faqat to'g'ri secret token bilan kelgan update lar qabul qilinadi"""
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+        handle_in_background=True,
+    ).register(app, path=settings.TELEGRAM_WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook():
+    if not settings.TELEGRAM_WEBHOOK_SECRET:
+        raise RuntimeError("TELEGRAM_WEBHOOK_SECRET is required in webhook mode")
+
+    runner = web.AppRunner(create_webhook_app())
+    await runner.setup()
+    site = web.TCPSite(runner, settings.TELEGRAM_WEBHOOK_HOST, settings.TELEGRAM_WEBHOOK_PORT)
+    await site.start()
+    logger.info(
+        f"Webhook server listening on {settings.TELEGRAM_WEBHOOK_HOST}:{settings.TELEGRAM_WEBHOOK_PORT}"
+        f"{settings.TELEGRAM_WEBHOOK_PATH}")
+
+    try:
+        # Bir nechta replika bo'lsa ham bir xil qiymat o'rnatiladi
+        if settings.TELEGRAM_WEBHOOK_URL:
+            await bot.set_webhook(
+                settings.TELEGRAM_WEBHOOK_URL,
+                secret_token=settings.TELEGRAM_WEBHOOK_SECRET,
+                allowed_updates=dp.resolve_used_update_types(),
+            )
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
 async def main():
-    logger.info("Starting Telegram bot...")
+    logger.info(f"Starting Telegram bot in {settings.TELEGRAM_BOT_MODE} mode...")
 
     try:
         # Bot ma'lumotlarini olish
         bot_info = await bot.get_me()
         logger.info(f"Bot started: @{bot_info.username}")
 
-        # Polling boshqarish
-        await dp.start_polling(bot, handle_signals=False)
+        if settings.TELEGRAM_BOT_MODE == 'webhook':
+            await run_webhook()
+        else:
+            await run_polling()
 
     except Exception as e:
         logger.error(f"Error starting bot: {e}")
@@ -1,7 +1,10 @@
 import os
 from pathlib import Path
 from decouple import config, Csv
+from django.core.exceptions import ImproperlyConfigured
 from celery import Celery
+from celery.schedules import crontab
+from kombu import Queue
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -42,6 +45,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Statik fayllarni .br/.gz variantlari va uzoq muddatli kesh bilan beradi
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -144,6 +149,24 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
 
+# collectstatic fayl nomlariga hash qo'shadi va yoniga .gz/.br nusxalarini yozadi.
+# Hash li fayllar "Cache-Control: max-age=315360000, immutable" bilan beriladi.
+STATIC_MANIFEST_STORAGE = config('STATIC_MANIFEST_STORAGE', default=not DEBUG, cast=bool)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'whitenoise.storage.CompressedManifestStaticFilesStorage'
+            if STATIC_MANIFEST_STORAGE
+            else 'django.contrib.staticfiles.storage.StaticFilesStorage'
+        ),
+    },
+}
+# Uchinchi tomon CSS laridagi yo'q fayllarga havolalar collectstatic ni to'xtatmasin
+WHITENOISE_MANIFEST_STRICT = False
+
 # Media files
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -164,10 +187,42 @@ CKEDITOR_CONFIGS = {
 LOGIN_URL = 'dashboard:login'
 
 
+# Cache configuration
+# Katalog/kurs versiyalari, to'lov sozlamalari va bot navbati jarayonlar orasida bitta keshni
+# ko'rishi kerak; LocMem har bir jarayonda alohida, shuning uchun faqat DEBUG da ruxsat etiladi
+REDIS_CACHE_URL = os.environ.get('REDIS_CACHE_URL')
+if not REDIS_CACHE_URL and not DEBUG:
+    raise ImproperlyConfigured('REDIS_CACHE_URL must be set when DEBUG is off')
+if REDIS_CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Anonim foydalanuvchilar uchun katalog sahifalari keshi (soniya)
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Sitemap fayllari keshi; katalog o'zgarganda versiya orqali yangilanadi
+SITEMAP_CACHE_TIMEOUT = 60 * 60 * 24
+
+
 # Session configuration
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+# Umumiy (Redis) kesh bo'lsa sessiyalar keshdan o'qiladi, bazaga faqat o'zgarganda yoziladi.
+# LocMem da logout boshqa worker dagi nusxani o'chirmaydi, shuning uchun faqat baza ishlatiladi
+SESSION_ENGINE = (
+    'django.contrib.sessions.backends.cached_db' if REDIS_CACHE_URL
+    else 'django.contrib.sessions.backends.db'
+)
 SESSION_COOKIE_AGE = 86400  # 24 hours
-SESSION_SAVE_EVERY_REQUEST = True
+SESSION_SAVE_EVERY_REQUEST = False
 
 
 # Email configuration (for production)
@@ -176,6 +231,20 @@ EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 # Telegram Bot Configuration
 TELEGRAM_BOT_TOKEN = os.environ.get('TELEGRAM_BOT_TOKEN')
 TELEGRAM_BOT_USERNAME = os.environ.get('TELEGRAM_BOT_USERNAME')
+
+# Bot rejimi: 'polling' (standart) yoki 'webhook'
+TELEGRAM_BOT_MODE = config('TELEGRAM_BOT_MODE', default='polling')
+# Telegram yuboradigan ommaviy manzil, masalan https://avtokontinent.uz/telegram/webhook
+TELEGRAM_WEBHOOK_URL = config('TELEGRAM_WEBHOOK_URL', default='')
+TELEGRAM_WEBHOOK_PATH = config('TELEGRAM_WEBHOOK_PATH', default='/telegram/webhook')
+# X-Telegram-Bot-Api-Secret-Token sarlavhasi bilan tekshiriladi
+TELEGRAM_WEBHOOK_SECRET = config('TELEGRAM_WEBHOOK_SECRET', default='')
+TELEGRAM_WEBHOOK_HOST = config('TELEGRAM_WEBHOOK_HOST', default='0.0.0.0')
+TELEGRAM_WEBHOOK_PORT = config('TELEGRAM_WEBHOOK_PORT', default=8081, cast=int)
+# Bir vaqtda qayta ishlanadigan update lar soni (ikkala rejimda ham)
+TELEGRAM_BOT_CONCURRENCY = config('TELEGRAM_BOT_CONCURRENCY', default=20, cast=int)
+# Lokal test uchun Telegram API o'rnini bosuvchi server (bo'sh bo'lsa api.telegram.org)
+TELEGRAM_API_BASE_URL = config('TELEGRAM_API_BASE_URL', default='')
 # Site settings
 SITE_NAME = 'Avtokontinent.uz'
 SITE_DESCRIPTION = 'Online Auto Spare Parts Store'
@@ -199,6 +268,59 @@ app.autodiscover_tasks()
 CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL')
 CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND')
 
+# Navbatlar ish turiga qarab ajratilgan; har biriga docker-compose da alohida worker:
+#   notifications - Telegram xabarlari (I/O): bitta jarayon, threads pool, so'rovlar
+#                   parallel va telegram_dispatcher chegaralari umumiy bo'ladi
+#   media         - rasm variantlari (CPU): prefork, prefetch 1
+#   reports       - hisobotlar va davriy tozalash: prefork, concurrency 1
+#   celery        - qolgan barcha vazifalar
+CELERY_TASK_DEFAULT_QUEUE = 'celery'
+CELERY_TASK_QUEUES = (
+    Queue('celery'),
+    Queue('notifications'),
+    Queue('media'),
+    Queue('reports'),
+)
+CELERY_TASK_ROUTES = {
+    'store.tasks.send_telegram_message_task': {'queue': 'notifications'},
+    'store.tasks.send_telegram_photo_task': {'queue': 'notifications'},
+    'store.tasks.notify_customer_status_change_task': {'queue': 'notifications'},
+    'store.tasks.send_admin_payment_notification_task': {'queue': 'notifications'},
+    'store.tasks.generate_image_variants_task': {'queue': 'media'},
+    'store.tasks.purge_expired_sessions_task': {'queue': 'reports'},
+    'store.tasks.purge_expired_telegram_auth_task': {'queue': 'reports'},
+    'store.tasks.purge_orphan_session_carts_task': {'queue': 'reports'},
+    'store.tasks.purge_orphan_guest_marks_task': {'queue': 'reports'},
+}
+# acks_late (config/celery.py) qayta bajarishga xavfsiz vazifalar uchun qoladi;
+# xabar yuborish takrorlansa mijoz ikki marta xabar oladi, shuning uchun oldindan ack
+CELERY_TASK_ANNOTATIONS = {
+    'store.tasks.send_telegram_message_task': {'acks_late': False},
+    'store.tasks.send_telegram_photo_task': {'acks_late': False},
+    'store.tasks.notify_customer_status_change_task': {'acks_late': False},
+    'store.tasks.send_admin_payment_notification_task': {'acks_late': False},
+}
+
+# Celery beat: davriy vazifalar
+CELERY_BEAT_SCHEDULE = {
+    'purge-expired-sessions': {
+        'task': 'store.tasks.purge_expired_sessions_task',
+        'schedule': 60 * 60,  # har soatda
+    },
+    'purge-expired-telegram-auth': {
+        'task': 'store.tasks.purge_expired_telegram_auth_task',
+        'schedule': AUTH_CLEANUP_INTERVAL_HOURS * 60 * 60,
+    },
+    'purge-orphan-session-carts': {
+        'task': 'store.tasks.purge_orphan_session_carts_task',
+        'schedule': crontab(hour=3, minute=15),  # har kuni tunda
+    },
+    'purge-orphan-guest-marks': {
+        'task': 'store.tasks.purge_orphan_guest_marks_task',
+        'schedule': crontab(hour=3, minute=45),
+    },
+}
+
 
 
 
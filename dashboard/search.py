@@ -0,0 +1,74 @@
+"""
+Dashboard qidiruvi.
+
+So'rov shakliga qarab indeksdan foydalana oladigan shart tanlanadi:
+  * raqamlar (boshida ``+`` bo'lishi mumkin, bo'shliq, ``-`` va qavslar
+    tashlab yuboriladi) - buyurtma/ID va telefon bo'yicha aniq moslik (btree);
+    topilmasa telefon ichidan qidiriladi
+  * 3 belgidan qisqa matn - boshlanishi bo'yicha (``istartswith``)
+  * qolgan matn - ``icontains``; PostgreSQL da ``UPPER(col)`` ustidagi
+    trigram GIN indekslari bilan bajariladi (store.apps.TRIGRAM_INDEXES)
+"""
+import re
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+
+# pg_trgm 3 belgidan qisqa so'zlar uchun indeksdan foydalana olmaydi
+MIN_TRIGRAM_LENGTH = 3
+
+# Buyurtma raqami sifatida qabul qilinadigan eng uzun son (bigint)
+MAX_ID_DIGITS = 18
+
+# Telefon yozilishidagi ajratgichlar: "+998 90 123-45-67", "(90)1234567"
+PHONE_SEPARATORS = re.compile(r'[\s\-()]')
+
+
+def phone_variants(digits):
+    """Stored forms of a phone number typed as digits: ``901234567`` -> ``+998901234567`` etc."""
+    variants = {digits, f'+{digits}'}
+    if len(digits) == 9:
+        variants.update({f'998{digits}', f'+998{digits}'})
+    return variants
+
+
+def _any(lookups):
+    return reduce(or_, (Q(**{lookup: value}) for lookup, value in lookups), Q(pk__in=[]))
+
+
+def search_queryset(queryset, query, text_fields=(), phone_fields=(), id_field=None):
+    """
+    Filter ``queryset`` by a dashboard search ``query``.
+
+    ``text_fields`` are matched by prefix or substring, ``phone_fields``
+    exactly for digit input (spaces, dashes and parentheses ignored), and
+    ``id_field`` exactly for plain digit input. Digit input with no exact
+    match falls back to substring matches on the phone and text fields;
+    without phone or id fields it is searched as text, e.g. numeric SKUs.
+    """
+    query = query.strip()
+    if not query:
+        return queryset
+
+    compact = PHONE_SEPARATORS.sub('', query)
+    digits = compact[1:] if compact.startswith('+') else compact
+    if digits.isdigit() and (phone_fields or id_field):
+        exact = [(f'{field}__in', phone_variants(digits)) for field in phone_fields]
+        # ID faqat ajratgichsiz raqam sifatida yoziladi
+        if id_field and digits == query and len(digits) <= MAX_ID_DIGITS:
+            exact.append((id_field, int(digits)))
+        exact_matches = queryset.filter(_any(exact))
+        if exact_matches.exists():
+            return exact_matches
+        return queryset.filter(
+            _any((f'{field}__contains', digits) for field in phone_fields)
+            | _text_filter(text_fields, query)
+        )
+
+    return queryset.filter(_text_filter(text_fields, query))
+
+
+def _text_filter(fields, query):
+    lookup = 'istartswith' if len(query) < MIN_TRIGRAM_LENGTH else 'icontains'
+    return _any((f'{field}__{lookup}', query) for field in fields)
@@ -1,7 +1,7 @@
 from django.shortcuts import  get_object_or_404
 from django.contrib.auth.decorators import user_passes_test
 from .home_views import dashboard_login_required, is_staff_user
-from store.models import Product, Brand, Banner, CarModel, Category, Order, ProductImage
+from store.models import Product, Brand, Banner, CarModel, Category, Order, OrderEvent, ProductImage
 
 from django.http import JsonResponse
 
@@ -176,6 +176,7 @@ def ajax_update_order_status(request):
         order = Order.objects.get(order_id=order_id)
         if new_status in dict(Order.STATUS_CHOICES):
             order.status = new_status
+            order.event_source = OrderEvent.SOURCE_DASHBOARD
             order.save()
 
             return JsonResponse({
@@ -200,6 +201,7 @@ def ajax_confirm_payment(request):
         order = Order.objects.get(order_id=order_id)
         order.payment_confirmed = True
         order.payment_confirmed_at = timezone.now()
+        order.event_source = OrderEvent.SOURCE_DASHBOARD
         order.save()
 
         return JsonResponse({
@@ -239,6 +241,7 @@ def ajax_reject_payment(request):
         order = Order.objects.get(order_id=order_id)
         order.payment_confirmed = False
         order.payment_confirmed_at = None
+        order.event_source = OrderEvent.SOURCE_DASHBOARD
         order.save()
 
         return JsonResponse({
@@ -2,32 +2,44 @@ from .home_views import dashboard_login_required, is_staff_user
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import user_passes_test
 from django.contrib import messages
-from store.models import Order
-from django.db.models import  Q
+from store.models import Order, OrderEvent, OrderItem
+from store.utils import get_branch_map
+from dashboard.search import search_queryset
+from django.db.models import Q, Count, Sum, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from dashboard.forms import OrderForm
 from django.core.paginator import Paginator
 
 
 
 
+ORDER_SEARCH_FIELDS = ['customer_name', 'user__username']
+
+
 # Order Management
 @dashboard_login_required
 @user_passes_test(is_staff_user)
 def orders_management(request):
     """Orders management page"""
-    orders = Order.objects.select_related('user').order_by('-created_at')
+    # Mahsulotlar soni va jami miqdor sahifa so'rovining o'zida; subquery bo'lgani
+    # uchun paginator COUNT(*) so'rovi ularni (va JOIN/GROUP BY ni) tashlab yuboradi
+    items = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order')
+    orders = Order.objects.select_related('user').annotate(
+        items_count=Coalesce(Subquery(items.annotate(count=Count('pk')).values('count')), 0),
+        items_quantity=Coalesce(Subquery(items.annotate(total=Sum('quantity')).values('total')), 0),
+    ).order_by('-created_at')
 
     # Search and filter
-    search_query = request.GET.get('search', '')
+    search_query = request.GET.get('search', '').strip()
     status_filter = request.GET.get('status', '')
     payment_filter = request.GET.get('payment', '')
 
     if search_query:
-        orders = orders.filter(
-            Q(order_id__icontains=search_query) |
-            Q(customer_name__icontains=search_query) |
-            Q(customer_phone__icontains=search_query) |
-            Q(user__username__icontains=search_query)
+        orders = search_queryset(
+            orders, search_query,
+            text_fields=ORDER_SEARCH_FIELDS,
+            phone_fields=['customer_phone'],
+            id_field='order_id',
         )
 
     if status_filter:
@@ -43,6 +55,11 @@ def orders_management(request):
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
 
+    # Filial nomlari xotiradagi CSV xaritasidan olinadi
+    branches = get_branch_map()
+    for order in page_obj:
+        order.branch = branches.get(str(order.delivery_branch_id)) if order.delivery_branch_id else None
+
     context = {
         'page_obj': page_obj,
         'search_query': search_query,
@@ -63,6 +80,7 @@ def order_detail(request, order_id):
     if request.method == 'POST':
         form = OrderForm(request.POST, instance=order)
         if form.is_valid():
+            order.event_source = OrderEvent.SOURCE_DASHBOARD
             form.save()
             messages.success(request, 'Order updated successfully!')
             return redirect('dashboard:order_detail', order_id=order_id)
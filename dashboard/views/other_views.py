@@ -9,6 +9,10 @@ from .home_views import dashboard_login_required, is_staff_user
 import json
 from django.contrib.auth.models import User
 from store.models import Order, Product, Category
+from store.utils import payment_confirmation_report
+from dashboard.search import search_queryset
+
+USER_SEARCH_FIELDS = ['username', 'email']
 
 
 
@@ -22,10 +26,10 @@ def users_management(request):
     # Search
     search_query = request.GET.get('search', '')
     if search_query:
-        users = users.filter(
-            Q(username__icontains=search_query) |
-            Q(email__icontains=search_query) |
-            Q(userprofile__phone_number__icontains=search_query)
+        users = search_queryset(
+            users, search_query,
+            text_fields=USER_SEARCH_FIELDS,
+            phone_fields=['userprofile__phone_number'],
         )
 
     # Pagination
@@ -95,6 +99,7 @@ def analytics(request):
         'product_performance': product_performance,
         'category_performance': category_performance,
         'user_stats': user_stats,
+        'payment_confirmation': payment_confirmation_report(),
     }
 
     return render(request, 'dashboard/analytics.html', context)
@@ -7,6 +7,12 @@ from django.http import JsonResponse
 from .home_views import dashboard_login_required, is_staff_user
 from store.models import Product, Category, CarModel, ProductImage
 from dashboard.forms import ProductForm
+from dashboard.search import search_queryset
+
+PRODUCT_SEARCH_FIELDS = [
+    'name_uz', 'name_cyrl', 'name_ru', 'sku',
+    'description_uz', 'description_cyrl', 'description_ru',
+]
 
 
 
@@ -28,15 +34,7 @@ def products_management(request):
     cart_filter = request.GET.get('cart_filter', '')
 
     if search_query:
-        products = products.filter(
-            Q(name_uz__icontains=search_query) |
-            Q(name_cyrl__icontains=search_query) |
-            Q(name_ru__icontains=search_query) |
-            Q(sku__icontains=search_query) |
-            Q(description_uz__icontains=search_query) |
-            Q(description_cyrl__icontains=search_query) |
-            Q(description_ru__icontains=search_query)
-        )
+        products = search_queryset(products, search_query, text_fields=PRODUCT_SEARCH_FIELDS)
 
     if category_filter:
         products = products.filter(category_id=category_filter)
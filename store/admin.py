@@ -4,9 +4,10 @@ from admin_thumbnails import thumbnail
 from .models import (
     Category, Brand, CarModel, Product, ProductImage,
     ExchangeRate, Banner, UserProfile, TelegramAuth, ProductLike,
-    ProductComment, Favorite, PaymentSettings, Order, OrderItem,
+    ProductComment, Favorite, PaymentSettings, Order, OrderItem, OrderEvent,
     Cart, CartItem
 )
+from .utils import variant_url
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
@@ -62,7 +63,7 @@ class BrandAdmin(admin.ModelAdmin):
 
     def logo_thumbnail(self, obj):
         if obj.logo:
-            return format_html('<img src="{}" style="max-height:50px;"/>', obj.logo.url)
+            return format_html('<img src="{}" style="max-height:50px;"/>', variant_url(obj.logo, 'thumb'))
         return "-"
     logo_thumbnail.short_description = 'Logo'
 
@@ -136,7 +137,7 @@ class BannerAdmin(admin.ModelAdmin):
 
     def image_thumbnail(self, obj):
         if obj.image:
-            return format_html('<img src="{}" style="max-height:50px;"/>', obj.image.url)
+            return format_html('<img src="{}" style="max-height:50px;"/>', variant_url(obj.image, 'thumb'))
         return "-"
     image_thumbnail.short_description = 'Image'
 
@@ -173,13 +174,24 @@ class OrderItemInline(admin.TabularInline):
     extra = 0
     readonly_fields = ['total_price_usd', 'total_price_uzs']
 
+class OrderEventInline(admin.TabularInline):
+    """Read-only order history"""
+    model = OrderEvent
+    extra = 0
+    can_delete = False
+    fields = ['created_at', 'type', 'source', 'old_value', 'new_value']
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['order_id', 'user', 'status', 'delivery_region', 'delivery_branch_name', 'total_amount_uzs', 'payment_confirmed', 'created_at']
     list_filter = ['status', 'payment_confirmed', 'created_at']
     search_fields = ['order_id', 'user__username', 'customer_name', 'customer_phone', 'delivery_branch_id']
     readonly_fields = ['order_id', 'created_at', 'updated_at', 'delivery_region', 'delivery_branch_name']
-    inlines = [OrderItemInline]
+    inlines = [OrderItemInline, OrderEventInline]
     
     fieldsets = (
         ('Order Information', {
@@ -196,6 +208,10 @@ class OrderAdmin(admin.ModelAdmin):
         }),
     )
 
+    def save_model(self, request, obj, form, change):
+        obj.event_source = OrderEvent.SOURCE_ADMIN
+        super().save_model(request, obj, form, change)
+
     def total_amount_uzs(self, obj):
         return f"{obj.total_amount_uzs:,.0f} UZS"
     total_amount_uzs.short_description = 'Total Amount (UZS)'
@@ -1,8 +1,48 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+# Dashboard qidiruvi (dashboard/search.py) uchun pg_trgm GIN indekslari: nom -> (jadval, ustun, UPPER).
+# icontains/istartswith UPPER(col) ni solishtiradi, telefonlar esa oddiy contains/in bilan qidiriladi.
+# Faqat PostgreSQL da migrate dan keyin yaratiladi, shuning uchun boshqa bazalarda sxema o'zgarmaydi.
+TRIGRAM_INDEXES = {
+    'product_name_uz_trgm': ('store_product', 'name_uz', True),
+    'product_name_cyrl_trgm': ('store_product', 'name_cyrl', True),
+    'product_name_ru_trgm': ('store_product', 'name_ru', True),
+    'product_sku_trgm': ('store_product', 'sku', True),
+    'product_desc_uz_trgm': ('store_product', 'description_uz', True),
+    'product_desc_cyrl_trgm': ('store_product', 'description_cyrl', True),
+    'product_desc_ru_trgm': ('store_product', 'description_ru', True),
+    'order_customer_name_trgm': ('store_order', 'customer_name', True),
+    'order_customer_phone_trgm': ('store_order', 'customer_phone', False),
+    'userprofile_phone_trgm': ('store_userprofile', 'phone_number', False),
+    'auth_user_username_trgm': ('auth_user', 'username', True),
+    'auth_user_email_trgm': ('auth_user', 'email', True),
+}
+
+
+def create_trigram_indexes(using, **kwargs):
+    """Enable pg_trgm and create the dashboard search indexes; no-op on other databases"""
+    from django.db import connections
+
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, (table, column, upper) in TRIGRAM_INDEXES.items():
+            expression = f'UPPER({quote(column)})' if upper else quote(column)
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {quote(name)} ON {quote(table)} '
+                f'USING gin ({expression} gin_trgm_ops)'
+            )
+
 
 class StoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'store'
 
     def ready(self):
-        import store.signals
\ No newline at end of file
+        import store.checks
+        import store.signals
+        post_migrate.connect(create_trigram_indexes, sender=self)
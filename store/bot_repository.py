@@ -0,0 +1,114 @@
+"""
+Telegram bot ma'lumotlar qatlami.
+
+Django async ORM ustida qurilgan; o'zgartirishlar bitta UPDATE so'rovi
+bilan bajariladi, obyektni yuklab ``save()`` qilish shart emas.
+"""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import TelegramAuth, Order, OrderEvent
+from .utils import aget_admin_chat_id
+
+# Kontakt yuborilishi kutiladigan sessiya yoshi
+PENDING_SESSION_WINDOW = timedelta(minutes=10)
+# Tasdiqlash kodi amal qilish muddati
+LOGIN_CODE_LIFETIME = timedelta(minutes=2)
+
+# attach_chat_to_session natijalari
+SESSION_ATTACHED = 'attached'
+SESSION_EXPIRED = 'expired'
+SESSION_NOT_FOUND = 'not_found'
+
+
+async def attach_chat_to_session(session_token, chat_id):
+    """
+    Bind a chat to a login session unless it has already expired.
+    Returns one of ``SESSION_ATTACHED``, ``SESSION_EXPIRED``, ``SESSION_NOT_FOUND``.
+    """
+    updated = await TelegramAuth.objects.filter(
+        session_token=session_token,
+        expires_at__gt=timezone.now(),
+    ).aupdate(chat_id=chat_id)
+    if updated:
+        return SESSION_ATTACHED
+    if await TelegramAuth.objects.filter(session_token=session_token).aexists():
+        return SESSION_EXPIRED
+    return SESSION_NOT_FOUND
+
+
+async def _recent_session(chat_id, has_phone):
+    return await (TelegramAuth.objects
+                  .filter(chat_id=chat_id,
+                          phone_number__isnull=not has_phone,
+                          created_at__gte=timezone.now() - PENDING_SESSION_WINDOW)
+                  .order_by('-created_at')
+                  .only('pk', 'session_token')
+                  .afirst())
+
+
+async def get_session_awaiting_contact(chat_id):
+    """Latest recent session of the chat that has no phone number yet"""
+    return await _recent_session(chat_id, has_phone=False)
+
+
+async def get_session_with_contact(chat_id):
+    """Latest recent session of the chat that already has a phone number"""
+    return await _recent_session(chat_id, has_phone=True)
+
+
+async def set_login_code(auth_id, code, phone_number=None):
+    """Store a fresh login code (and the phone number, if given) in one UPDATE"""
+    fields = {
+        'code': code,
+        'expires_at': timezone.now() + LOGIN_CODE_LIFETIME,
+        'is_used': False,
+    }
+    if phone_number is not None:
+        fields['phone_number'] = phone_number
+    return await TelegramAuth.objects.filter(pk=auth_id).aupdate(**fields)
+
+
+async def get_admin_chat_id():
+    """admin_chat_id from PaymentSettings (cached), or None"""
+    return await aget_admin_chat_id()
+
+
+async def get_order_customer_chat_id(order_id):
+    """
+    ``(found, telegram_chat_id)`` for an order; the chat id is None when the
+    customer has no profile and empty when Telegram was never linked.
+    """
+    row = await (Order.objects
+                 .filter(order_id=order_id)
+                 .values('user__userprofile__telegram_chat_id')
+                 .afirst())
+    if row is None:
+        return False, None
+    return True, row['user__userprofile__telegram_chat_id']
+
+
+async def _record_bot_event(order_id, event_type):
+    await OrderEvent.objects.abulk_create([
+        OrderEvent(order_id=order_id, type=event_type, source=OrderEvent.SOURCE_BOT)
+    ])
+
+
+async def confirm_order_payment(order_id):
+    """Mark an order's payment as confirmed; returns the number of rows updated"""
+    now = timezone.now()
+    # update() auto_now ni to'ldirmaydi va signal yubormaydi: hodisa shu yerda yoziladi
+    updated = await Order.objects.filter(order_id=order_id).aupdate(
+        payment_confirmed=True,
+        payment_confirmed_at=now,
+        updated_at=now,
+    )
+    if updated:
+        await _record_bot_event(order_id, OrderEvent.PAYMENT_CONFIRMED)
+    return updated
+
+
+async def record_payment_cancelled(order_id):
+    """Log that an admin rejected the payment from Telegram"""
+    await _record_bot_event(order_id, OrderEvent.PAYMENT_CANCELLED)
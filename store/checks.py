@@ -0,0 +1,17 @@
+from django.core.checks import Error, Tags, register
+
+from .utils import is_cache_shared
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Version counters, payment settings and Telegram coalescing must see one cache in every process"""
+    if is_cache_shared():
+        return []
+    return [
+        Error(
+            'The default cache is local to each process.',
+            hint='Set REDIS_CACHE_URL so the web, bot and Celery processes share one cache.',
+            id='store.E001',
+        )
+    ]
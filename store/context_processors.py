@@ -10,9 +10,15 @@ def categories(request):
 
 
 def cart(request):
-    """Add cart information to all templates"""
+    """
+    Add cart information to all templates.
+
+    Guest pages are served from the anonymous page cache, so guest counters
+    are loaded client-side from ``ajax_header_counts`` instead.
+    """
     cart_items_count = 0
     cart_total = 0
+    favorites_count = 0
 
     if request.user.is_authenticated:
         try:
@@ -21,24 +27,12 @@ def cart(request):
             cart_total = cart.total_price_uzs
         except Cart.DoesNotExist:
             pass
-    elif request.session.session_key:
-        try:
-            cart = Cart.objects.get(session_key=request.session.session_key, user=None)
-            cart_items_count = cart.total_items
-            cart_total = cart.total_price_uzs
-        except Cart.DoesNotExist:
-            pass
 
-    # Add favorites count for guests
-    favorites_count = 0
-    if request.user.is_authenticated:
         try:
             from .models import Favorite
             favorites_count = Favorite.objects.filter(user=request.user).count()
         except:
             favorites_count = 0
-    else:
-        favorites_count = len(request.session.get('favorites', []))
 
     return {
         'cart_items_count': cart_items_count,
@@ -0,0 +1,136 @@
+"""
+Davriy tozalash ishlari (Celery beat orqali ishga tushadi).
+
+O'chirish kichik bo'laklarda bajariladi: har bir bo'lak alohida qisqa
+tranzaksiya, shuning uchun jadval uzoq vaqt qulflanmaydi.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .models import TelegramAuth, Cart, CartItem, GuestFavorite, GuestLike
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Shundan eski mehmon savatlari egasiz hisoblanadi
+SESSION_CART_MAX_AGE_DAYS = 7
+
+
+def delete_in_batches(queryset, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Delete the rows of ``queryset`` ``batch_size`` primary keys at a time,
+    walking the primary key upwards so every batch is a short index range
+    scan. ``progress(deleted)`` is called after each batch. Returns the
+    number of ``queryset.model`` rows deleted (cascades not included).
+    """
+    model = queryset.model
+    label = model._meta.label
+    queryset = queryset.order_by('pk')
+    deleted = 0
+    last_pk = None
+
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        pks = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+
+        with transaction.atomic():
+            _, per_model = model.objects.filter(pk__in=pks).delete()
+        deleted += per_model.get(label, 0)
+        last_pk = pks[-1]
+
+        if progress:
+            progress(deleted)
+        if len(pks) < batch_size:
+            break
+
+    return deleted
+
+
+def _sessions_in_database():
+    return settings.SESSION_ENGINE.endswith(('.db', '.cached_db'))
+
+
+def purge_expired_telegram_auth(batch_size=DEFAULT_BATCH_SIZE):
+    """Login sessions whose code has expired"""
+    return delete_in_batches(TelegramAuth.objects.filter(expires_at__lt=timezone.now()), batch_size)
+
+
+def orphan_session_carts(days=SESSION_CART_MAX_AGE_DAYS):
+    """Guest carts (no user) created more than ``days`` days ago"""
+    return Cart.objects.filter(user=None, created_at__lt=timezone.now() - timedelta(days=days))
+
+
+def count_orphan_session_carts(days=SESSION_CART_MAX_AGE_DAYS):
+    """``(carts, cart_items)`` that ``purge_orphan_session_carts`` would delete"""
+    carts = orphan_session_carts(days)
+    return carts.count(), CartItem.objects.filter(cart__in=carts).count()
+
+
+def purge_orphan_session_carts(days=SESSION_CART_MAX_AGE_DAYS, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Delete orphan guest carts in primary key ranges of ``batch_size``.
+
+    Django's collector would load every cart and item before deleting; here
+    each range is two plain DELETE statements (items first, then carts) in
+    one short transaction, so memory use does not grow with the table.
+    Cart and CartItem have no delete signals or other dependants.
+    ``progress(deleted, last_pk, max_pk)`` is called after each range.
+    Returns the number of carts deleted.
+    """
+    carts = orphan_session_carts(days)
+    bounds = carts.aggregate(first=Min('pk'), last=Max('pk'))
+    if bounds['first'] is None:
+        return 0
+
+    deleted = 0
+    for start in range(bounds['first'], bounds['last'] + 1, batch_size):
+        end = min(start + batch_size, bounds['last'] + 1)
+        batch = carts.filter(pk__gte=start, pk__lt=end)
+        with transaction.atomic():
+            CartItem.objects.filter(cart__in=batch)._raw_delete(CartItem.objects.db)
+            deleted += batch._raw_delete(batch.db)
+        if progress:
+            progress(deleted, end - 1, bounds['last'])
+
+    return deleted
+
+
+def purge_expired_sessions(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Batched replacement for ``SessionStore.clear_expired()`` on database
+    backed engines; other engines expire sessions themselves.
+    """
+    if not _sessions_in_database():
+        from importlib import import_module
+        import_module(settings.SESSION_ENGINE).SessionStore.clear_expired()
+        return 0
+    return delete_in_batches(Session.objects.filter(expire_date__lt=timezone.now()), batch_size)
+
+
+def purge_orphan_guest_marks(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Guest favorites and likes whose session no longer exists; they can never
+    be merged into an account. Returns ``{model label: rows deleted}``.
+    """
+    now = timezone.now()
+    # Sessiyadan yoshroq belgilar tekshirilmaydi: sessiya hali ham tirik
+    cutoff = now - timedelta(seconds=settings.SESSION_COOKIE_AGE)
+
+    deleted = {}
+    for model in (GuestFavorite, GuestLike):
+        queryset = model.objects.filter(created_at__lt=cutoff)
+        if _sessions_in_database():
+            queryset = queryset.exclude(
+                session_key__in=Session.objects.filter(expire_date__gte=now).values('session_key')
+            )
+        deleted[model._meta.label] = delete_in_batches(queryset, batch_size)
+    return deleted
@@ -0,0 +1,185 @@
+import random
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import DateTimeField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from store.models import Category, Order, Product, TelegramAuth
+
+
+class Rollback(Exception):
+    """Raised to roll back the seeded rows"""
+
+
+def key_queries():
+    """
+    ``(label, table, queryset)`` for the hot query paths that must be served
+    by an index. The filters and ordering mirror the views that run them.
+    """
+    now = timezone.now()
+    category = Category.objects.order_by('pk').first()
+    user = User.objects.order_by('pk').first()
+    active = Product.objects.filter(is_active=True)
+
+    queries = [
+        ('home: featured products', 'store_product',
+         active.filter(is_featured=True)[:8]),
+        ('home: latest products', 'store_product',
+         active.order_by('-created_at')[:8]),
+        ('catalogue: sort by name', 'store_product',
+         active.order_by('name', 'id')[:12]),
+        ('catalogue: sort by price', 'store_product',
+         active.order_by('price_usd', 'id')[:12]),
+        ('dashboard: out of stock', 'store_product',
+         Product.objects.filter(stock_quantity=0).order_by('-created_at')[:20]),
+        ('dashboard: recent orders', 'store_order',
+         Order.objects.order_by('-created_at')[:10]),
+        ('dashboard: orders by status', 'store_order',
+         Order.objects.filter(status='pending').order_by('-created_at')[:20]),
+        ('dashboard: weekly revenue', 'store_order',
+         Order.objects.filter(payment_confirmed=True, created_at__gte=now - timedelta(days=7))),
+        ('bot: recent chat session', 'store_telegramauth',
+         TelegramAuth.objects.filter(chat_id='100000', phone_number__isnull=True,
+                                     created_at__gte=now - timedelta(minutes=10))
+         .order_by('-created_at')[:1]),
+        ('maintenance: expired logins', 'store_telegramauth',
+         TelegramAuth.objects.filter(expires_at__lt=now - timedelta(days=30)).values('pk')),
+    ]
+    if category:
+        queries.append(('catalogue: category', 'store_product',
+                        active.filter(category=category).order_by('-created_at')[:12]))
+    if user:
+        queries.append(('my orders', 'store_order',
+                        Order.objects.filter(user=user).order_by('-created_at')[:20]))
+    return queries
+
+
+def scans_whole_table(plan, table):
+    """True if the EXPLAIN output reads ``table`` with a sequential scan"""
+    return re.search(rf'Seq Scan on {table}\b', plan) is not None
+
+
+def analyze():
+    """Refresh planner statistics of the checked tables"""
+    tables = [model._meta.db_table for model in (Product, Order, TelegramAuth)]
+    with connection.cursor() as cursor:
+        for table in tables:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+
+
+def seed(rows):
+    """
+    Insert ``rows`` products, orders and login sessions with realistic shapes:
+    few categories, mostly active products, a handful of statuses.
+    """
+    rng = random.Random(0)
+    now = timezone.now()
+    statuses = [value for value, _ in Order.STATUS_CHOICES]
+
+    categories = Category.objects.bulk_create([
+        Category(name=f'Seed {index}', slug=f'seed-category-{index}') for index in range(20)
+    ])
+    users = User.objects.bulk_create([
+        User(username=f'seed-user-{index}') for index in range(max(1, rows // 20))
+    ])
+
+    products = Product.objects.bulk_create([
+        Product(
+            name=f'Seed product {index}', name_uz=f'Seed product {index}',
+            name_cyrl=f'Seed product {index}', name_ru=f'Seed product {index}',
+            slug=f'seed-product-{index}', sku=f'SEED-{index}',
+            category=rng.choice(categories), description='', main_image='products/seed.jpg',
+            price_usd=Decimal(rng.randint(1, 50000)) / 100,
+            stock_quantity=0 if rng.random() < 0.02 else rng.randint(1, 100),
+            is_active=rng.random() < 0.9, is_featured=rng.random() < 0.01,
+        )
+        for index in range(rows)
+    ], batch_size=1000)
+
+    orders = Order.objects.bulk_create([
+        Order(
+            user=rng.choice(users), status=rng.choice(statuses),
+            total_amount_usd=1, total_amount_uzs=12500, exchange_rate_used=12500,
+            customer_name=f'Seed {index}', customer_phone=f'+99890{index:07d}',
+            payment_confirmed=rng.random() < 0.5,
+        )
+        for index in range(rows)
+    ], batch_size=1000)
+
+    logins = TelegramAuth.objects.bulk_create([
+        TelegramAuth(session_token=f'seed{index:08d}', chat_id=str(100000 + index // 3),
+                     expires_at=now - timedelta(minutes=index))
+        for index in range(rows)
+    ], batch_size=1000)
+
+    # auto_now_add hammasiga bir xil vaqt qo'yadi; bir yilga yoyib chiqamiz
+    spread = RawSQL("now() - random() * interval '365 days'", [], output_field=DateTimeField())
+    for seeded in (products, orders, logins):
+        model = type(seeded[0])
+        model.objects.filter(pk__in=[obj.pk for obj in seeded]).update(created_at=spread)
+
+
+DEFAULT_SEED_ROWS = 20000
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the hot Product/Order/TelegramAuth queries on seeded data and fail if the planner '
+        'picks a sequential scan for any of them. Must run against PostgreSQL; the seeded rows '
+        'are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=DEFAULT_SEED_ROWS,
+            help=f'Products, orders and login sessions to insert and ANALYZE before the check '
+                 f'(default: {DEFAULT_SEED_ROWS}); 0 checks the existing data as is'
+        )
+        parser.add_argument(
+            '--show-plans',
+            action='store_true',
+            help='Print the plan of every query, not only the failing ones'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError(f'Query plans are checked on PostgreSQL only, not {connection.vendor}')
+        if options['seed'] < 0:
+            raise CommandError('--seed must not be negative')
+
+        failures = []
+        try:
+            with transaction.atomic():
+                if options['seed']:
+                    seed(options['seed'])
+                analyze()
+                failures = self.check_plans(options['show_plans'])
+                raise Rollback
+        except Rollback:
+            pass
+
+        if failures:
+            raise CommandError(f'{len(failures)} queries scan the whole table: {", ".join(failures)}')
+        self.stdout.write(self.style.SUCCESS('All key queries use an index'))
+
+    def check_plans(self, show_plans):
+        failures = []
+        for label, table, queryset in key_queries():
+            plan = queryset.explain()
+            if scans_whole_table(plan, table):
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f'FULL SCAN  {label}'))
+                self.stdout.write(plan)
+            else:
+                self.stdout.write(f'ok         {label}')
+                if show_plans:
+                    self.stdout.write(plan)
+        return failures
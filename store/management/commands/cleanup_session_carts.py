@@ -1,7 +1,7 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from datetime import timedelta
-from store.models import Cart
+from django.core.management.base import BaseCommand, CommandError
+from store.maintenance import (
+    count_orphan_session_carts, purge_orphan_session_carts, DEFAULT_BATCH_SIZE, SESSION_CART_MAX_AGE_DAYS
+)
 
 
 class Command(BaseCommand):
@@ -11,20 +11,38 @@ class Command(BaseCommand):
         parser.add_argument(
             '--days',
             type=int,
-            default=7,
-            help='Delete session carts older than this many days (default: 7)'
+            default=SESSION_CART_MAX_AGE_DAYS,
+            help=f'Delete session carts older than this many days (default: {SESSION_CART_MAX_AGE_DAYS})'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Cart primary keys per DELETE batch (default: {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only count the carts and items that would be deleted'
         )
 
     def handle(self, *args, **options):
         days = options['days']
-        cutoff_date = timezone.now() - timedelta(days=days)
-        
-        # Delete session carts (user=None) older than cutoff date
-        deleted_count = Cart.objects.filter(
-            user=None,
-            created_at__lt=cutoff_date
-        ).delete()[0]
-        
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive')
+
+        if options['dry_run']:
+            carts, items = count_orphan_session_carts(days)
+            self.stdout.write(f'{carts} orphaned session carts ({items} items) older than {days} days would be deleted')
+            return
+
+        def progress(deleted, last_pk, max_pk):
+            self.stdout.write(f'  {deleted} carts deleted (pk {last_pk}/{max_pk})')
+
+        deleted_count = purge_orphan_session_carts(
+            days, options['batch_size'], progress if options['verbosity'] > 0 else None
+        )
+
         self.stdout.write(
             self.style.SUCCESS(
                 f'Successfully deleted {deleted_count} orphaned session carts older than {days} days'
@@ -0,0 +1,81 @@
+import os
+import time
+from multiprocessing import Pool
+
+from django.apps import apps
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+from PIL import UnidentifiedImageError
+
+from store.utils import IMAGE_FIELDS
+from store.utils.image_utils import generate_variants_for_name
+
+
+def _process(args):
+    """Pool worker: generate variants for one file, never raises"""
+    name, force = args
+    try:
+        return name, generate_variants_for_name(default_storage, name, force=force), None
+    except (OSError, UnidentifiedImageError) as e:
+        return name, 0, str(e)
+
+
+class Command(BaseCommand):
+    help = 'Generate resized WebP/JPEG variants for all catalogue images'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help='Number of worker processes (default: CPU count)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Regenerate variants even if they are up to date'
+        )
+
+    def collect_names(self):
+        names = set()
+        for model_label, fields in IMAGE_FIELDS.items():
+            model = apps.get_model(model_label)
+            for row in model.objects.values_list(*fields).iterator():
+                names.update(name for name in row if name)
+        return sorted(names)
+
+    def handle(self, *args, **options):
+        names = self.collect_names()
+        total = len(names)
+        self.stdout.write(f'{total} images found, {options["workers"]} workers')
+
+        # Forked worker processes must not share the parent's DB connections
+        connections.close_all()
+
+        started = time.monotonic()
+        generated = skipped = failed = written = 0
+        jobs = ((name, options['force']) for name in names)
+        with Pool(processes=max(options['workers'], 1)) as pool:
+            for done, (name, count, error) in enumerate(pool.imap_unordered(_process, jobs, chunksize=4), 1):
+                if error:
+                    failed += 1
+                    self.stderr.write(f'{name}: {error}')
+                elif count:
+                    generated += 1
+                    written += count
+                else:
+                    skipped += 1
+
+                if done % 100 == 0:
+                    elapsed = time.monotonic() - started
+                    self.stdout.write(f'{done}/{total} ({done / elapsed:.1f} images/s)')
+
+        elapsed = time.monotonic() - started
+        rate = total / elapsed if elapsed else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Done in {elapsed:.1f}s: {generated} generated ({written} files), '
+                f'{skipped} up to date, {failed} failed, {rate:.1f} images/s'
+            )
+        )
@@ -0,0 +1,113 @@
+import asyncio
+import random
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from aiohttp import web
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from store.telegram_dispatcher import TelegramDispatcher, TelegramAPIError, TelegramRetryAfter
+from store.telegram_fakes import create_api_stub_app, start_update, contact_update, callback_update
+
+
+class Command(BaseCommand):
+    help = ('Local Telegram stand-in: run a Bot API stub, post fake updates to the bot webhook '
+            'or push messages through the outbound dispatcher')
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['api', 'updates', 'dispatch'],
+                            help="'api' serves a Bot API stub, 'updates' posts fake updates to the webhook, "
+                                 "'dispatch' sends messages to the stub through TelegramDispatcher")
+        parser.add_argument('--port', type=int, default=8082, help='Bot API stub port (default: 8082)')
+        parser.add_argument('--per-chat-interval', type=float, default=0,
+                            help='Stub answers 429 to a chat messaged again within this many seconds')
+        parser.add_argument('--api-url', default=settings.TELEGRAM_API_BASE_URL or 'http://127.0.0.1:8082',
+                            help='Bot API base URL for dispatch (default: TELEGRAM_API_BASE_URL or the local stub)')
+        parser.add_argument('--chats', type=int, default=10, help='Distinct chats messaged by dispatch (default: 10)')
+        parser.add_argument(
+            '--url',
+            default=f'http://127.0.0.1:{settings.TELEGRAM_WEBHOOK_PORT}{settings.TELEGRAM_WEBHOOK_PATH}',
+            help='Webhook URL to post updates to'
+        )
+        parser.add_argument('--secret', default=settings.TELEGRAM_WEBHOOK_SECRET, help='Webhook secret token')
+        parser.add_argument('--count', type=int, default=100, help='Number of updates to post (default: 100)')
+        parser.add_argument('--concurrency', type=int, default=10, help='Parallel requests (default: 10)')
+        parser.add_argument('--token', default='login_stub', help='Session token used in /start updates')
+
+    def handle(self, *args, **options):
+        if options['action'] == 'api':
+            self.stdout.write(f"Bot API stub: set TELEGRAM_API_BASE_URL=http://127.0.0.1:{options['port']}")
+            app = create_api_stub_app(per_chat_interval=options['per_chat_interval'] or None)
+            web.run_app(app, port=options['port'], print=None)
+        elif options['action'] == 'dispatch':
+            self.dispatch_messages(options)
+        else:
+            asyncio.run(self.post_updates(options))
+
+    def dispatch_messages(self, options):
+        dispatcher = TelegramDispatcher(settings.TELEGRAM_BOT_TOKEN or 'stub', base_url=options['api_url'])
+
+        def send(index):
+            chat_id = 200000 + index % options['chats']
+            try:
+                dispatcher.send_message(chat_id, f'Stub message #{index}')
+                return 'sent'
+            except TelegramRetryAfter:
+                return 'retry_after'
+            except TelegramAPIError:
+                return 'rejected'
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            results = dict(Counter(executor.map(send, range(options['count']))))
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{options['count']} messages to {options['chats']} chats in {elapsed:.2f}s "
+                f"({options['count'] / elapsed:.1f}/s), results {results}"
+            )
+        )
+
+    def make_update(self, index, options):
+        # Har bir soxta foydalanuvchi: /start, kontakt, kodni yangilash
+        chat_id = 100000 + index // 3
+        kind = index % 3
+        if kind == 0:
+            return start_update(chat_id, options['token'])
+        if kind == 1:
+            return contact_update(chat_id, f'+99890{random.randint(1000000, 9999999)}')
+        return callback_update(chat_id, 'retry_code')
+
+    async def post_updates(self, options):
+        if not options['secret']:
+            raise CommandError('Webhook secret is required (--secret or TELEGRAM_WEBHOOK_SECRET)')
+
+        headers = {'X-Telegram-Bot-Api-Secret-Token': options['secret']}
+        semaphore = asyncio.Semaphore(options['concurrency'])
+        statuses = {}
+        latencies = []
+
+        async with aiohttp.ClientSession(headers=headers) as session:
+            async def post(index):
+                async with semaphore:
+                    started = time.monotonic()
+                    async with session.post(options['url'], json=self.make_update(index, options)) as response:
+                        statuses[response.status] = statuses.get(response.status, 0) + 1
+                    latencies.append(time.monotonic() - started)
+
+            started = time.monotonic()
+            await asyncio.gather(*(post(index) for index in range(options['count'])))
+            elapsed = time.monotonic() - started
+
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{options['count']} updates in {elapsed:.2f}s ({options['count'] / elapsed:.1f}/s), "
+                f"p95 {p95 * 1000:.1f} ms, statuses {statuses}"
+            )
+        )
@@ -161,8 +161,24 @@ class Product(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['name']),
-            models.Index(fields=['description']),
+            # Katalog va bosh sahifa faqat faol mahsulotlarni ko'rsatadi (qisman indekslar)
+            models.Index(fields=['-created_at'], condition=models.Q(is_active=True),
+                         name='product_active_created_idx'),
+            models.Index(fields=['category', '-created_at'], condition=models.Q(is_active=True),
+                         name='product_category_active_idx'),
+            models.Index(fields=['price_usd', 'id'], condition=models.Q(is_active=True),
+                         name='product_active_price_idx'),
+            # "name" bo'yicha saralash joriy til ustuniga aylanadi (modeltranslation)
+            models.Index(fields=['name_uz', 'id'], condition=models.Q(is_active=True),
+                         name='product_active_name_uz_idx'),
+            models.Index(fields=['name_cyrl', 'id'], condition=models.Q(is_active=True),
+                         name='product_active_name_cyrl_idx'),
+            models.Index(fields=['name_ru', 'id'], condition=models.Q(is_active=True),
+                         name='product_active_name_ru_idx'),
+            models.Index(fields=['-created_at'], condition=models.Q(is_featured=True),
+                         name='product_featured_idx'),
+            models.Index(fields=['-created_at'], condition=models.Q(stock_quantity=0),
+                         name='product_out_of_stock_idx'),
         ]
 
     def __str__(self):
@@ -187,11 +203,12 @@ class Product(models.Model):
     @property
     def price_uzs(self):
         """Convert USD price to UZS"""
-        try:
-            exchange_rate = ExchangeRate.objects.get(is_active=True)
-            return self.price_usd * exchange_rate.usd_to_uzs
-        except ExchangeRate.DoesNotExist:
+        from .utils.exchange_utils import get_active_usd_to_uzs
+
+        usd_to_uzs = get_active_usd_to_uzs()
+        if usd_to_uzs is None:
             return self.price_usd * 12000  # Default rate
+        return self.price_usd * usd_to_uzs
 
     @property
     def is_in_stock(self):
@@ -286,6 +303,12 @@ class TelegramAuth(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Bot chatning oxirgi sessiyasini qidiradi (bot_repository._recent_session)
+            models.Index(fields=['chat_id', '-created_at'], name='telegramauth_chat_created_idx'),
+            # Muddati o'tganlarni tozalash (maintenance.purge_expired_telegram_auth)
+            models.Index(fields=['expires_at'], name='telegramauth_expires_idx'),
+        ]
 
     def __str__(self):
         return f"{self.phone_number} - {self.code}"
@@ -335,6 +358,32 @@ class Favorite(models.Model):
         return f"{self.user.username} - {self.product.name}"
 
 
+class GuestFavorite(models.Model):
+    """Favorite of a guest visitor, keyed by session instead of user"""
+    session_key = models.CharField(max_length=40)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='guest_favorites')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['session_key', 'product']
+
+    def __str__(self):
+        return f"Session {self.session_key} - {self.product.name}"
+
+
+class GuestLike(models.Model):
+    """Like of a guest visitor, keyed by session instead of user"""
+    session_key = models.CharField(max_length=40)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='guest_likes')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['session_key', 'product']
+
+    def __str__(self):
+        return f"Session {self.session_key} likes {self.product.name}"
+
+
 class PaymentSettings(models.Model):
     card_number = models.CharField(max_length=20)
     card_holder_name = models.CharField(max_length=100)
@@ -414,11 +463,57 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # O'zgarishi kuzatiladigan maydonlar (signal eski qiymatni shu yerdan oladi)
+    TRACKED_FIELDS = ('status', 'payment_confirmed')
+    # OrderEvent.source qiymati; dashboard va admin saqlashdan oldin o'zgartiradi
+    event_source = 'site'
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='order_created_idx'),
+            # "Buyurtmalarim" sahifasi
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+            # Dashboard holat filtri
+            models.Index(fields=['status', '-created_at'], name='order_status_created_idx'),
+            # Daromad statistikasi faqat tasdiqlangan buyurtmalarni yig'adi
+            models.Index(fields=['created_at'], condition=models.Q(payment_confirmed=True),
+                         name='order_confirmed_created_idx'),
+        ]
 
     def __str__(self):
         return f"Order {self.order_id} - {self.user.username}"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def _snapshot_tracked_fields(self, fields=None):
+        # Kechiktirilgan (defer/only) maydonlar eslab qolinmaydi
+        snapshot = self.__dict__.setdefault('_loaded_values', {})
+        for name in fields or self.TRACKED_FIELDS:
+            if name in self.TRACKED_FIELDS and name in self.__dict__:
+                snapshot[name] = self.__dict__[name]
+
+    def get_changed_fields(self, fields=None):
+        """
+        ``{field: old_value}`` for tracked fields that differ from the values
+        loaded from (or last saved to) the database, optionally limited to
+        ``fields``. A new, unsaved order has no changes.
+        """
+        snapshot = self.__dict__.get('_loaded_values', {})
+        return {
+            name: old_value
+            for name, old_value in snapshot.items()
+            if (fields is None or name in fields) and getattr(self, name) != old_value
+        }
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # post_save signallari eski qiymatlarni ko'rib bo'lgach yangilanadi
+        self._snapshot_tracked_fields(kwargs.get('update_fields'))
     
     @property
     def delivery_branch_info(self):
@@ -453,6 +548,56 @@ class OrderItem(models.Model):
         return 0  # yoki None
 
 
+class OrderEvent(models.Model):
+    """Append-only log of order lifecycle events"""
+    CREATED = 'created'
+    SCREENSHOT_UPLOADED = 'screenshot_uploaded'
+    PAYMENT_CONFIRMED = 'payment_confirmed'
+    PAYMENT_CANCELLED = 'payment_cancelled'
+    STATUS_CHANGED = 'status_changed'
+    TYPE_CHOICES = [
+        (CREATED, 'Created'),
+        (SCREENSHOT_UPLOADED, 'Screenshot uploaded'),
+        (PAYMENT_CONFIRMED, 'Payment confirmed'),
+        (PAYMENT_CANCELLED, 'Payment cancelled'),
+        (STATUS_CHANGED, 'Status changed'),
+    ]
+
+    SOURCE_SITE = 'site'
+    SOURCE_DASHBOARD = 'dashboard'
+    SOURCE_ADMIN = 'admin'
+    SOURCE_BOT = 'bot'
+    SOURCE_CHOICES = [
+        (SOURCE_SITE, 'Site'),
+        (SOURCE_DASHBOARD, 'Dashboard'),
+        (SOURCE_ADMIN, 'Django admin'),
+        (SOURCE_BOT, 'Telegram bot'),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='events')
+    type = models.CharField(max_length=30, choices=TYPE_CHOICES)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default=SOURCE_SITE)
+    old_value = models.CharField(max_length=20, blank=True)
+    new_value = models.CharField(max_length=20, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['order', 'created_at']),
+            models.Index(fields=['type', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"Order {self.order_id}: {self.type}"
+
+    def save(self, *args, **kwargs):
+        # Yozuvlar faqat qo'shiladi, o'zgartirilmaydi
+        if not self._state.adding:
+            raise ValueError("OrderEvent rows are append-only")
+        super().save(*args, **kwargs)
+
+
 class Cart(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, blank=True, null=True)
     session_key = models.CharField(max_length=40, blank=True, null=True)
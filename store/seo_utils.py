@@ -1,141 +1,293 @@
 """
 SEO utilities for Avtokontinent website
 Helps optimize search visibility for both 'avtokontinent' and 'автоконтинент'
+
+Tables are built once at import and frozen; per-product payloads are cached
+per language and dropped when the product changes (see signals.py) or when
+the catalogue/exchange-rate version moves on.
 """
+import json
+from types import MappingProxyType
+
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import translation
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+from .utils.page_cache import get_cache_version, CATALOGUE_VERSION, EXCHANGE_RATE_VERSION
+
+SEO_KEYWORDS = (
+    # Primary brand keywords
+    'avtokontinent',
+    'автоконтинент', 
+    'avtokontinent.uz',
+    'автоконтинент.уз',
+    
+    # Brand variations
+    'avto kontinent',
+    'авто континент',
+    'avtokontinent uz',
+    'автоконтинент уз',
+    
+    # Location-based brand searches
+    'avtokontinent uzbekistan',
+    'автоконтинент узбекистан',
+    'avtokontinent toshkent',
+    'автоконтинент ташкент',
+    'avtokontinent zarafshon',
+    'автоконтинент зарафшан',
+    'avtokontinent navoiy',
+    'автоконтинент навои',
+    
+    # Service-based brand searches
+    'avtokontinent online',
+    'автоконтинент онлайн',
+    'avtokontinent do\'kon',
+    'автоконтинент магазин',
+    'avtokontinent katalog',
+    'автоконтинент каталог',
+    'avtokontinent sotib olish',
+    'автоконтинент купить',
+    'avtokontinent narxlar',
+    'автоконтинент цены',
+    'avtokontinent yetkazib berish',
+    'автоконтинент доставка',
+    
+    # Quality indicators with brand
+    'avtokontinent original',
+    'автоконтинент оригинальные',
+    'avtokontinent sifatli',
+    'автоконтинент качественные',
+    'avtokontinent ishonchli',
+    'автоконтинент надежные',
+    'avtokontinent arzon',
+    'автоконтинент дешевые',
+    'avtokontinent tezkor',
+    'автоконтинент быстрые',
+    
+    # Business keywords in Uzbek
+    'avtomobil ehtiyot qismlar',
+    'avtomobil qismlar',
+    'auto parts uzbekistan',
+    'vakum nasos',
+    'babina',
+    'tormoz qismlari',
+    'avtomobil do\'koni',
+    'original qismlar',
+    'ehtiyot qismlar sotib olish',
+    
+    # Business keywords in Russian
+    'автозапчасти узбекистан',
+    'автозапчасти ташкент',
+    'вакуумный насос',
+    'катушка зажигания',
+    'тормозные детали',
+    'магазин автозапчастей',
+    'оригинальные запчасти',
+    'купить автозапчасти',
+    
+    # Location keywords
+    'toshkent avtomobil qismlar',
+    'ташкент автозапчасти',
+    'uzbekistan auto parts',
+    'zarafshon avtomobil',
+    'зарафшан автозапчасти',
+    'samarqand avtomobil qismlar',
+    'самарканд автозапчасти',
+    'buxoro avtomobil qismlar',
+    'бухара автозапчасти',
+    'farg\'ona avtomobil qismlar',
+    'фергана автозапчасти',
+    'andijon avtomobil qismlar',
+    'андижан автозапчасти',
+    
+    # Car brand combinations
+    'toyota qismlar avtokontinent',
+    'hyundai qismlar avtokontinent',
+    'chevrolet qismlar avtokontinent',
+    'kia qismlar avtokontinent',
+    'daewoo qismlar avtokontinent',
+    'тойота запчасти автоконтинент',
+    'хендай запчасти автоконтинент',
+    'шевроле запчасти автоконтинент',
+    'киа запчасти автоконтинент',
+    'дэу запчасти автоконтинент'
+)
+
+META_DESCRIPTIONS = MappingProxyType({
+    'uz': "Avtokontinent.uz (Автоконтинент.уз) - O'zbekistondagi eng yaxshi avtomobil ehtiyot qismlari do'koni. Barcha brendlar uchun original qismlar: vakum nasos, babina, tormoz qismlari. Toshkent, Samarqand, Buxoro bo'ylab tezkor yetkazib berish.",
+    'ru': "Автоконтинент.уз (Avtokontinent.uz) - Лучший магазин автозапчастей в Узбекистане. Оригинальные запчасти для всех марок: вакуумный насос, катушка, тормозные детали. Быстрая доставка по Ташкенту, Самарканду, Бухаре.",
+    'cyrl': "Автоконтинент.уз (Avtokontinent.uz) - Ўзбекистондаги энг яхши автомобил эҳтиёт қисмлари дўкони. Барча брендлар учун оригинал қисмлар: вакум насос, бобина, тормоз қисмлари."
+})
+
+PAGE_TITLES = MappingProxyType({
+    'home': MappingProxyType({
+        'uz': "Avtokontinent.uz (Автоконтинент.уз) - Avtomobil Ehtiyot Qismlari | Auto Parts Uzbekistan",
+        'ru': "Автоконтинент.уз (Avtokontinent.uz) - Автозапчасти Узбекистан | Магазин Автозапчастей",
+        'cyrl': "Автоконтинент.уз (Avtokontinent.uz) - Автомобил Эҳтиёт Қисмлари | Авто Қисмлар"
+    }),
+    'products': MappingProxyType({
+        'uz': "Avtomobil Qismlar - Avtokontinent.uz | Автозапчасти - Автоконтинент.уз",
+        'ru': "Автозапчасти - Автоконтинент.уз | Avtomobil Qismlar - Avtokontinent.uz",
+        'cyrl': "Автомобил Қисмлар - Автоконтинент.уз | Avtokontinent.uz"
+    }),
+    'brands': MappingProxyType({
+        'uz': "Avtomobil Brendlar - Avtokontinent.uz | Марки Авто - Автоконтинент.уз",
+        'ru': "Марки Автомобилей - Автоконтинент.уз | Avtomobil Brendlar - Avtokontinent.uz",
+        'cyrl': "Автомобил Брендлар - Автоконтинент.уз | Avtokontinent.uz"
+    })
+})
+
+STRUCTURED_DATA_KEYWORDS = "avtokontinent, автоконтинент, avtomobil qismlar, автозапчасти, auto parts, ehtiyot qismlar, vakum nasos, вакуумный насос, babina, катушка, tormoz qismlari, тормозные детали, O'zbekiston, Узбекистан, Toshkent, Ташкент"
+
+# Sayt tili -> hreflang kodi
+HREFLANG_CODES = MappingProxyType({
+    'uz': 'uz',
+    'ru': 'ru',
+    'cyrl': 'uz-Cyrl',
+})
 
+# Mahsulot sahifasi SEO ma'lumotlari keshi (soniya)
+PRODUCT_SEO_CACHE_TIMEOUT = 60 * 60 * 24
 
+PRODUCT_DESCRIPTION_SUFFIX = MappingProxyType({
+    'uz': "Original avtomobil qismlari Avtokontinent.uz da. Tezkor yetkazib berish O'zbekiston bo'ylab.",
+    'ru': "Оригинальные автозапчасти в Автоконтинент.уз. Быстрая доставка по Узбекистану.",
+    'cyrl': "Оригинал автомобил қисмлари Автоконтинент.уз да. Ўзбекистон бўйлаб тезкор етказиб бериш.",
+})
+
+PRODUCT_TITLE_SUFFIX = MappingProxyType({
+    'uz': "Avtomobil ehtiyot qismlari | Avtokontinent.uz",
+    'ru': "Автозапчасти | Автоконтинент.уз",
+    'cyrl': "Автомобил эҳтиёт қисмлари | Автоконтинент.уз",
+})
 
 
 def get_seo_keywords():
     """Return comprehensive list of SEO keywords for the brand"""
-    return [
-        # Primary brand keywords
-        'avtokontinent',
-        'автоконтинент', 
-        'avtokontinent.uz',
-        'автоконтинент.уз',
-        
-        # Brand variations
-        'avto kontinent',
-        'авто континент',
-        'avtokontinent uz',
-        'автоконтинент уз',
-        
-        # Location-based brand searches
-        'avtokontinent uzbekistan',
-        'автоконтинент узбекистан',
-        'avtokontinent toshkent',
-        'автоконтинент ташкент',
-        'avtokontinent zarafshon',
-        'автоконтинент зарафшан',
-        'avtokontinent navoiy',
-        'автоконтинент навои',
-        
-        # Service-based brand searches
-        'avtokontinent online',
-        'автоконтинент онлайн',
-        'avtokontinent do\'kon',
-        'автоконтинент магазин',
-        'avtokontinent katalog',
-        'автоконтинент каталог',
-        'avtokontinent sotib olish',
-        'автоконтинент купить',
-        'avtokontinent narxlar',
-        'автоконтинент цены',
-        'avtokontinent yetkazib berish',
-        'автоконтинент доставка',
-        
-        # Quality indicators with brand
-        'avtokontinent original',
-        'автоконтинент оригинальные',
-        'avtokontinent sifatli',
-        'автоконтинент качественные',
-        'avtokontinent ishonchli',
-        'автоконтинент надежные',
-        'avtokontinent arzon',
-        'автоконтинент дешевые',
-        'avtokontinent tezkor',
-        'автоконтинент быстрые',
-        
-        # Business keywords in Uzbek
-        'avtomobil ehtiyot qismlar',
-        'avtomobil qismlar',
-        'auto parts uzbekistan',
-        'vakum nasos',
-        'babina',
-        'tormoz qismlari',
-        'avtomobil do\'koni',
-        'original qismlar',
-        'ehtiyot qismlar sotib olish',
-        
-        # Business keywords in Russian
-        'автозапчасти узбекистан',
-        'автозапчасти ташкент',
-        'вакуумный насос',
-        'катушка зажигания',
-        'тормозные детали',
-        'магазин автозапчастей',
-        'оригинальные запчасти',
-        'купить автозапчасти',
-        
-        # Location keywords
-        'toshkent avtomobil qismlar',
-        'ташкент автозапчасти',
-        'uzbekistan auto parts',
-        'zarafshon avtomobil',
-        'зарафшан автозапчасти',
-        'samarqand avtomobil qismlar',
-        'самарканд автозапчасти',
-        'buxoro avtomobil qismlar',
-        'бухара автозапчасти',
-        'farg\'ona avtomobil qismlar',
-        'фергана автозапчасти',
-        'andijon avtomobil qismlar',
-        'андижан автозапчасти',
-        
-        # Car brand combinations
-        'toyota qismlar avtokontinent',
-        'hyundai qismlar avtokontinent',
-        'chevrolet qismlar avtokontinent',
-        'kia qismlar avtokontinent',
-        'daewoo qismlar avtokontinent',
-        'тойота запчасти автоконтинент',
-        'хендай запчасти автоконтинент',
-        'шевроле запчасти автоконтинент',
-        'киа запчасти автоконтинент',
-        'дэу запчасти автоконтинент'
-    ]
+    return list(SEO_KEYWORDS)
 
 def get_meta_description(language='uz'):
     """Get optimized meta description for different languages"""
-    descriptions = {
-        'uz': "Avtokontinent.uz (Автоконтинент.уз) - O'zbekistondagi eng yaxshi avtomobil ehtiyot qismlari do'koni. Barcha brendlar uchun original qismlar: vakum nasos, babina, tormoz qismlari. Toshkent, Samarqand, Buxoro bo'ylab tezkor yetkazib berish.",
-        'ru': "Автоконтинент.уз (Avtokontinent.uz) - Лучший магазин автозапчастей в Узбекистане. Оригинальные запчасти для всех марок: вакуумный насос, катушка, тормозные детали. Быстрая доставка по Ташкенту, Самарканду, Бухаре.",
-        'cyrl': "Автоконтинент.уз (Avtokontinent.uz) - Ўзбекистондаги энг яхши автомобил эҳтиёт қисмлари дўкони. Барча брендлар учун оригинал қисмлар: вакум насос, бобина, тормоз қисмлари."
-    }
-    return descriptions.get(language, descriptions['uz'])
+    return META_DESCRIPTIONS.get(language, META_DESCRIPTIONS['uz'])
 
 def get_page_title(page_type='home', language='uz'):
     """Get optimized page titles for different pages and languages"""
-    titles = {
-        'home': {
-            'uz': "Avtokontinent.uz (Автоконтинент.уз) - Avtomobil Ehtiyot Qismlari | Auto Parts Uzbekistan",
-            'ru': "Автоконтинент.уз (Avtokontinent.uz) - Автозапчасти Узбекистан | Магазин Автозапчастей",
-            'cyrl': "Автоконтинент.уз (Avtokontinent.uz) - Автомобил Эҳтиёт Қисмлари | Авто Қисмлар"
-        },
-        'products': {
-            'uz': "Avtomobil Qismlar - Avtokontinent.uz | Автозапчасти - Автоконтинент.уз",
-            'ru': "Автозапчасти - Автоконтинент.уз | Avtomobil Qismlar - Avtokontinent.uz",
-            'cyrl': "Автомобил Қисмлар - Автоконтинент.уз | Avtokontinent.uz"
+    return PAGE_TITLES.get(page_type, PAGE_TITLES['home']).get(language, PAGE_TITLES['home']['uz'])
+
+def get_structured_data_keywords():
+    """Return structured data keywords for JSON-LD"""
+    return STRUCTURED_DATA_KEYWORDS
+
+
+def _product_seo_key(product_id, language):
+    # Kategoriya, brend va model nomlari ham payload ichida: katalog versiyasi kalitga kiradi
+    return (f'seo:product:{product_id}:{language}'
+            f':c{get_cache_version(CATALOGUE_VERSION)}:r{get_cache_version(EXCHANGE_RATE_VERSION)}')
+
+
+def invalidate_product_seo(product_id):
+    """Drop cached SEO payloads of a product in every language"""
+    cache.delete_many([_product_seo_key(product_id, code) for code, _ in settings.LANGUAGES])
+
+
+def _json_ld(data):
+    # </script> ichida xavfsiz bo'lishi uchun
+    return (json.dumps(data, ensure_ascii=False)
+            .replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026'))
+
+
+def build_product_seo(product, language):
+    """
+    Title, description, keywords, JSON-LD and hreflang links of a product page.
+    Expects the prefetches made by ``product_detail`` (images, compatible
+    models with brands, ``top_comments``, ``rating_avg``, ``ratings_total``).
+    """
+    site_url = settings.SITE_URL
+    name = product.name
+    short_description = strip_tags(product.short_description or '')
+    models = list(product.compatible_models.all())
+    brand_name = models[0].brand.name if models else None
+
+    title = product.meta_title or f"{name} - {PRODUCT_TITLE_SUFFIX.get(language, PRODUCT_TITLE_SUFFIX['uz'])}"
+    description = product.meta_description or ' '.join(filter(None, [
+        name,
+        '-',
+        Truncator(short_description).words(20, truncate='…'),
+        PRODUCT_DESCRIPTION_SUFFIX.get(language, PRODUCT_DESCRIPTION_SUFFIX['uz']),
+    ]))
+    keywords = ', '.join(
+        [name]
+        + [f"{model.brand.name} {model.name}" for model in models[:5]]
+        + ['avtomobil qismlari', 'ehtiyot qismlar', product.category.name, 'автозапчасти']
+    )
+
+    hreflang = []
+    for code, _ in settings.LANGUAGES:
+        with translation.override(code):
+            hreflang.append((HREFLANG_CODES.get(code, code), site_url + reverse('product_detail', args=[product.slug])))
+    hreflang.append(('x-default', dict(hreflang)[HREFLANG_CODES[settings.LANGUAGE_CODE]]))
+
+    with translation.override(language):
+        url = site_url + product.get_absolute_url()
+
+    structured = {
+        "@context": "https://schema.org",
+        "@type": "Product",
+        "name": name,
+        "description": short_description,
+        "sku": product.sku,
+        "brand": {"@type": "Brand", "name": brand_name or "Avtokontinent"},
+        "category": product.category.name,
+        "image": [site_url + product.main_image.url] + [site_url + image.image.url for image in product.images.all()],
+        "offers": {
+            "@type": "Offer",
+            "url": url,
+            "priceCurrency": "UZS",
+            "price": str(product.price_uzs),
+            "availability": "https://schema.org/InStock" if product.is_in_stock else "https://schema.org/OutOfStock",
+            "seller": {"@type": "Organization", "name": "Avtokontinent.uz"},
         },
-        'brands': {
-            'uz': "Avtomobil Brendlar - Avtokontinent.uz | Марки Авто - Автоконтинент.уз",
-            'ru': "Марки Автомобилей - Автоконтинент.уз | Avtomobil Brendlar - Avtokontinent.uz",
-            'cyrl': "Автомобил Брендлар - Автоконтинент.уз | Avtokontinent.uz"
+        "manufacturer": {"@type": "Organization", "name": brand_name or "Universal"},
+        "vehicleEngine": ", ".join(f"{model.brand.name} {model.name}" for model in models[:3]),
+    }
+    # O'rtacha va soni barcha tasdiqlangan, baholangan sharhlar bo'yicha (faqat ko'rsatilgan 4 tasi emas)
+    if product.ratings_total:
+        structured["aggregateRating"] = {
+            "@type": "AggregateRating",
+            "ratingValue": str(round(product.rating_avg, 1)),
+            "reviewCount": str(product.ratings_total),
         }
+        structured["review"] = [
+            {
+                "@type": "Review",
+                "author": {"@type": "Person", "name": comment.user.username},
+                "datePublished": comment.created_at.date().isoformat(),
+                "description": Truncator(comment.comment).words(30),
+                "reviewRating": {"@type": "Rating", "ratingValue": str(comment.rating)},
+            }
+            for comment in product.top_comments if comment.rating
+        ]
+
+    return {
+        'title': title,
+        'description': description,
+        'keywords': keywords,
+        'og_title': f"{name} - Avtokontinent.uz",
+        'url': url,
+        'hreflang': hreflang,
+        'json_ld': _json_ld(structured),
     }
-    return titles.get(page_type, titles['home']).get(language, titles['home']['uz'])
 
-def get_structured_data_keywords():
-    """Return structured data keywords for JSON-LD"""
-    return "avtokontinent, автоконтинент, avtomobil qismlar, автозапчасти, auto parts, ehtiyot qismlar, vakum nasos, вакуумный насос, babina, катушка, tormoz qismlari, тормозные детали, O'zbekiston, Узбекистан, Toshkent, Ташкент"
+
+def get_product_seo(product, language=None):
+    """Cached ``build_product_seo`` payload for the active language"""
+    language = language or translation.get_language()
+    key = _product_seo_key(product.pk, language)
+    payload = cache.get(key)
+    if payload is None:
+        payload = build_product_seo(product, language)
+        cache.set(key, payload, PRODUCT_SEO_CACHE_TIMEOUT)
+    return payload
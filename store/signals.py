@@ -1,60 +1,137 @@
 import logging
 import time
 
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
 from django.dispatch import receiver
-from .models import Order
-from .tasks import notify_customer_status_change_task, send_admin_payment_notification_task
+from .models import (
+    Order, ExchangeRate, PaymentSettings, Product, ProductImage, Category, Brand, CarModel, Banner, ProductComment,
+    ProductLike
+)
+from .tasks import (
+    notify_customer_status_change_task, send_admin_payment_notification_task, generate_image_variants_task
+)
+from .seo_utils import invalidate_product_seo
+from .utils import (
+    bump_cache_version, has_variants, invalidate_exchange_rate, invalidate_payment_settings, order_change_events,
+    record_order_events, IMAGE_FIELDS, EXCHANGE_RATE_VERSION, CATALOGUE_VERSION
+)
 
 logger = logging.getLogger(__name__)
 
-# Status o'zgarishini kuzatish uchun
-_order_old_status = {}
-
-
-@receiver(pre_save, sender=Order)
-def store_old_status(sender, instance, **kwargs):
-    """Eski statusni saqlash"""
-    if instance.pk:
-        try:
-            old_instance = Order.objects.get(pk=instance.pk)
-            _order_old_status[instance.pk] = old_instance.status
-        except Order.DoesNotExist:
-            _order_old_status[instance.pk] = None
-
 
 @receiver(post_save, sender=Order)
 def send_order_notification(sender, instance, created, update_fields, **kwargs):
     logger.info(
         f"Signal ishga tushdi: Order ID {instance.order_id}, Created: {created}, Update Fields: {update_fields}")
 
-    # Status o'zgarganligini tekshirish
-    if not created and instance.pk in _order_old_status:
-        old_status = _order_old_status.get(instance.pk)
-        new_status = instance.status
+    # Status o'zgarganligini tekshirish (eski qiymat from_db dagi nusxadan olinadi)
+    changed = {} if created else instance.get_changed_fields(update_fields)
+
+    # Buyurtma tarixi: shu saqlashdagi barcha hodisalar bitta INSERT bilan
+    record_order_events(order_change_events(instance, created, changed, update_fields))
 
-        if old_status and old_status != new_status:
-            logger.info(f"Order {instance.order_id} status o'zgardi: {old_status} -> {new_status}")
+    if changed.get('status'):
+        old_status = changed['status']
+        new_status = instance.status
+        logger.info(f"Order {instance.order_id} status o'zgardi: {old_status} -> {new_status}")
 
-            # Mijozga asenkron xabar yuborish
+        def notify_status_change():
+            # Mijozga asenkron xabar yuborish; tranzaksiya bekor qilinsa yuborilmaydi
             try:
                 task_result = notify_customer_status_change_task.delay(instance.pk, old_status, new_status)
                 logger.info(f"Status o'zgarishi vazifasi yaratildi: {task_result.id}")
             except Exception as e:
                 logger.error(f"Status o'zgarishi vazifasini yaratishda xato: {e}")
 
-        # Eski statusni o'chirish
-        del _order_old_status[instance.pk]
+        transaction.on_commit(notify_status_change)
 
     # Payment screenshot yuklanganda adminga asenkron xabar yuborish
     if update_fields and 'payment_screenshot' in update_fields and instance.payment_screenshot:
+        # Fayl save() ichida UPDATE dan oldin yoziladi; vazifa faqat commit dan keyin navbatga qo'yiladi
         logger.info(f"To'lov cheki yuklandi: {instance.payment_screenshot.path}")
 
-        try:
-            task_result = send_admin_payment_notification_task.delay(instance.pk)
-            logger.info(f"Admin xabari vazifasi yaratildi: {task_result.id}")
-        except Exception as e:
-            logger.error(f"Admin xabari vazifasini yaratishda xato: {e}")
+        def notify_admin():
+            try:
+                task_result = send_admin_payment_notification_task.delay(instance.pk)
+                logger.info(f"Admin xabari vazifasi yaratildi: {task_result.id}")
+            except Exception as e:
+                logger.error(f"Admin xabari vazifasini yaratishda xato: {e}")
+
+        transaction.on_commit(notify_admin)
     else:
         logger.info(
-            f"Shart bajarilmadi: created={created}, payment_screenshot={instance.payment_screenshot}, update_fields={update_fields}")
\ No newline at end of file
+            f"Shart bajarilmadi: created={created}, payment_screenshot={instance.payment_screenshot}, update_fields={update_fields}")
+
+
+@receiver([post_save, post_delete], sender=ExchangeRate)
+def invalidate_page_cache_on_rate_change(sender, **kwargs):
+    """Kurs o'zgarsa keshdagi narxlar eskiradi"""
+    invalidate_exchange_rate()
+    bump_cache_version(EXCHANGE_RATE_VERSION)
+
+
+@receiver([post_save, post_delete], sender=PaymentSettings)
+def invalidate_payment_settings_cache(sender, **kwargs):
+    """To'lov sozlamalari o'zgarsa sayt, bot va Celery keshini tozalash"""
+    invalidate_payment_settings()
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Brand)
+@receiver([post_save, post_delete], sender=CarModel)
+@receiver([post_save, post_delete], sender=Banner)
+@receiver([post_save, post_delete], sender=ProductComment)
+@receiver([post_save, post_delete], sender=ProductLike)
+@receiver(m2m_changed, sender=Product.compatible_models.through)
+def invalidate_page_cache_on_catalogue_change(sender, **kwargs):
+    """Katalog o'zgarsa anonim sahifalar keshini yangilash"""
+    bump_cache_version(CATALOGUE_VERSION)
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_product_seo_on_save(sender, instance, **kwargs):
+    """Mahsulot SEO ma'lumotlari keshini yangilash"""
+    invalidate_product_seo(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=ProductComment)
+def invalidate_product_seo_on_related_change(sender, instance, **kwargs):
+    """Rasm yoki sharh o'zgarsa mahsulot JSON-LD si eskiradi"""
+    invalidate_product_seo(instance.product_id)
+
+
+@receiver(m2m_changed, sender=Product.compatible_models.through)
+def invalidate_product_seo_on_models_change(sender, instance, reverse, pk_set, **kwargs):
+    """Mos modellar o'zgarsa mahsulot kalit so'zlari eskiradi"""
+    if not reverse:
+        invalidate_product_seo(instance.pk)
+    else:
+        for product_id in pk_set or ():
+            invalidate_product_seo(product_id)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=ProductImage)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_save, sender=Banner)
+def generate_image_variants_on_upload(sender, instance, **kwargs):
+    """Yangi rasm yuklansa o'lchamli variantlarni fonda yaratish"""
+    model_label = sender._meta.label
+
+    def enqueue(field_name):
+        try:
+            generate_image_variants_task.delay(model_label, instance.pk, field_name)
+        except Exception as e:
+            # Broker ishlamasa ham saqlash to'xtamasin; generate_image_variants buyrug'i to'ldiradi
+            logger.error(f"Rasm variantlari vazifasini yaratishda xato: {e}")
+
+    for field_name in IMAGE_FIELDS.get(model_label, ()):
+        field_file = getattr(instance, field_name)
+        if not field_file or has_variants(field_file):
+            continue
+        transaction.on_commit(lambda field_name=field_name: enqueue(field_name))
@@ -1,70 +1,253 @@
-from django.contrib.sitemaps import Sitemap
+from datetime import datetime
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core.cache import cache
 from django.urls import reverse
-from django.utils import timezone
+from django.utils import translation
+
 from .models import Product, Brand, Category
+from .seo_utils import HREFLANG_CODES
+from .utils.page_cache import get_cache_version, CATALOGUE_VERSION
 
-class StaticViewSitemap(Sitemap):
-    """Sitemap for static pages with multilingual support"""
-    changefreq = "daily"
-    priority = 0.9
-    protocol = 'https'
-
-    def items(self):
-        # Include key pages that should rank for brand searches
-        return ["home", "product_list", "brand_list", "category_list"]
-
-    def location(self, item):
-        try:
-            return reverse(item)
-        except:
-            # Fallback for URLs that might not exist
-            if item == "brand_list":
-                return "/brands/"
-            elif item == "category_list":
-                return "/categories/"
-            return reverse("home")
-    
-    def lastmod(self, item):
-        return timezone.now()
-
-
-class ProductSitemap(Sitemap):
-    """Sitemap for products"""
-    changefreq = "weekly"
-    priority = 0.7
-    protocol = 'https'
+# Bitta sitemap faylidagi <url> lar soni chegarasi (sitemaps.org protokoli)
+SITEMAP_LIMIT = 50000
+
+# Bir vaqtda yuboriladigan elementlar soni
+STREAM_CHUNK_SIZE = 500
+
+URLSET_HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+    'xmlns:xhtml="http://www.w3.org/1999/xhtml">\n'
+)
+URLSET_FOOTER = '</urlset>\n'
+
+SLUG_PLACEHOLDER = 'sitemap-slug'
+
+
+def _languages():
+    return [code for code, _ in settings.LANGUAGES]
+
+
+def localized_paths(url_name, **kwargs):
+    """``{language: path}`` for a URL name, one reverse() per language"""
+    paths = {}
+    for language in _languages():
+        with translation.override(language):
+            paths[language] = reverse(url_name, kwargs=kwargs or None)
+    return paths
+
+
+class SitemapSection:
+    """A group of pages rendered as ``<url>`` entries with hreflang alternates"""
+    name = None
+    changefreq = None
+    priority = None
+
+    def count(self):
+        """Number of pages (not ``<url>`` entries) in the section"""
+        raise NotImplementedError
+
+    def entries(self, offset, limit):
+        """Yield ``({language: path}, lastmod)`` for pages ``offset..offset+limit``"""
+        raise NotImplementedError
+
+    @staticmethod
+    def pages_per_file():
+        # Har bir sahifa har bir til uchun alohida <url> bo'ladi
+        return SITEMAP_LIMIT // len(_languages())
+
+    def page_count(self, count):
+        return max(1, -(-count // self.pages_per_file()))
 
-    def items(self):
-        return Product.objects.filter(is_active=True).select_related('category')
 
-    def lastmod(self, obj):
-        return getattr(obj, 'updated_at', None)
+class StaticViewSitemap(SitemapSection):
+    """Key pages that should rank for brand searches"""
+    name = 'static'
+    changefreq = 'daily'
+    priority = '0.9'
+    url_names = ['home', 'product_list', 'brands']
 
-    def location(self, obj):
-        return obj.get_absolute_url()
+    def count(self):
+        return len(self.url_names)
 
+    def entries(self, offset, limit):
+        for url_name in self.url_names[offset:offset + limit]:
+            yield localized_paths(url_name), None
 
-class BrandSitemap(Sitemap):
+
+class SlugSitemapSection(SitemapSection):
+    """Section whose pages are one URL pattern filled with each object's slug"""
+    url_name = None
+    lastmod_field = None
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def build_path(self, template, slug):
+        return template.replace(SLUG_PLACEHOLDER, slug)
+
+    def url_kwargs(self):
+        return {'slug': SLUG_PLACEHOLDER}
+
+    def count(self):
+        return self.get_queryset().count()
+
+    def entries(self, offset, limit):
+        templates = localized_paths(self.url_name, **self.url_kwargs())
+        fields = ['slug'] + ([self.lastmod_field] if self.lastmod_field else [])
+        queryset = self.get_queryset().only(*fields).order_by('pk')[offset:offset + limit]
+        for obj in queryset.iterator(chunk_size=2000):
+            paths = {
+                language: self.build_path(template, obj.slug)
+                for language, template in templates.items()
+            }
+            lastmod = getattr(obj, self.lastmod_field) if self.lastmod_field else None
+            yield paths, lastmod
+
+
+class ProductSitemap(SlugSitemapSection):
+    """Sitemap for products"""
+    name = 'products'
+    changefreq = 'weekly'
+    priority = '0.7'
+    url_name = 'product_detail'
+    lastmod_field = 'updated_at'
+
+    def get_queryset(self):
+        return Product.objects.filter(is_active=True)
+
+
+class BrandSitemap(SlugSitemapSection):
     """Sitemap for brands"""
-    changefreq = "monthly"
-    priority = 0.6
-    protocol = 'https'
+    name = 'brands'
+    changefreq = 'monthly'
+    priority = '0.6'
+    url_name = 'brand_models'
 
-    def items(self):
+    def url_kwargs(self):
+        return {'brand_slug': SLUG_PLACEHOLDER}
+
+    def get_queryset(self):
         return Brand.objects.filter(is_active=True)
 
-    def location(self, obj):
-        return reverse("brand_models", args=[obj.slug])
 
+class CategorySitemap(SlugSitemapSection):
+    """Sitemap for categories (filtered product list)"""
+    name = 'categories'
+    changefreq = 'weekly'
+    priority = '0.6'
+    url_name = 'product_list'
+
+    def url_kwargs(self):
+        return {}
 
-class CategorySitemap(Sitemap):
-    """Sitemap for categories"""
-    changefreq = "weekly"
-    priority = 0.6
-    protocol = 'https'
+    def build_path(self, template, slug):
+        return f"{template}?category={slug}"
 
-    def items(self):
+    def get_queryset(self):
         return Category.objects.filter(is_active=True)
 
-    def location(self, obj):
-        return f"/products/?category={obj.slug}"
\ No newline at end of file
+
+SITEMAP_SECTIONS = {
+    section.name: section
+    for section in (StaticViewSitemap(), ProductSitemap(), BrandSitemap(), CategorySitemap())
+}
+
+
+def _format_lastmod(value):
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    return value.isoformat() if value else None
+
+
+def render_url_entries(section, base_url, paths, lastmod):
+    """``<url>`` entries of one page, one per language, sharing the alternates"""
+    alternates = ''.join(
+        f'<xhtml:link rel="alternate" hreflang="{HREFLANG_CODES.get(language, language)}" '
+        f'href={quoteattr(base_url + path)}/>'
+        for language, path in paths.items()
+    )
+    default_path = paths.get(settings.LANGUAGE_CODE)
+    if default_path:
+        alternates += f'<xhtml:link rel="alternate" hreflang="x-default" href={quoteattr(base_url + default_path)}/>'
+
+    details = ''
+    lastmod = _format_lastmod(lastmod)
+    if lastmod:
+        details += f'<lastmod>{lastmod}</lastmod>'
+    details += f'<changefreq>{section.changefreq}</changefreq><priority>{section.priority}</priority>'
+
+    return ''.join(
+        f'<url><loc>{escape(base_url + path)}</loc>{details}{alternates}</url>\n'
+        for path in paths.values()
+    )
+
+
+def iter_urlset(base_url, shards):
+    """Stream a ``<urlset>`` document for ``[(section, page), ...]`` in chunks"""
+    yield URLSET_HEADER
+    for section, page in shards:
+        limit = section.pages_per_file()
+        buffer = []
+        for paths, lastmod in section.entries((page - 1) * limit, limit):
+            buffer.append(render_url_entries(section, base_url, paths, lastmod))
+            if len(buffer) >= STREAM_CHUNK_SIZE:
+                yield ''.join(buffer)
+                buffer = []
+        if buffer:
+            yield ''.join(buffer)
+    yield URLSET_FOOTER
+
+
+def iter_sitemap_index(base_url, urls):
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+    )
+    for url in urls:
+        yield f'<sitemap><loc>{escape(base_url + url)}</loc></sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def iter_root_sitemap(base_url):
+    """
+    All sections in one ``<urlset>`` while they fit in a single file,
+    otherwise a ``<sitemapindex>`` pointing at the section shards.
+    """
+    counts = {name: section.count() for name, section in SITEMAP_SECTIONS.items()}
+    if sum(counts.values()) * len(_languages()) <= SITEMAP_LIMIT:
+        yield from iter_urlset(base_url, [(section, 1) for section in SITEMAP_SECTIONS.values()])
+        return
+
+    urls = []
+    for name, section in SITEMAP_SECTIONS.items():
+        location = reverse('sitemap_section', kwargs={'section': name})
+        for page in range(1, section.page_count(counts[name]) + 1):
+            urls.append(location if page == 1 else f'{location}?p={page}')
+    yield from iter_sitemap_index(base_url, urls)
+
+
+def sitemap_cache_key(name):
+    """Cache key of a rendered sitemap file; changes whenever the catalogue does"""
+    return f'sitemap:{name}:c{get_cache_version(CATALOGUE_VERSION)}'
+
+
+def cached_stream(cache_key, chunks):
+    """
+    Return the cached document as a single chunk, or stream ``chunks`` and
+    cache the joined result once the stream has been fully consumed.
+    """
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return [cached]
+
+    def generate():
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        cache.set(cache_key, ''.join(parts), settings.SITEMAP_CACHE_TIMEOUT)
+
+    return generate()
@@ -1,42 +1,39 @@
-import time
-
 from celery import shared_task
 import requests
 import os
 import logging
-import json
 from django.conf import settings
 from django.utils import timezone
 import pytz
-from .models import Order, PaymentSettings
+from . import maintenance
+from .models import Order
+from .telegram_dispatcher import (
+    get_dispatcher, next_coalesce_generation, is_superseded, TelegramAPIError, TelegramRetryAfter, COALESCE_DELAY
+)
+from .utils import get_admin_chat_id, is_cache_shared
 
 logger = logging.getLogger(__name__)
 
 
-def get_admin_chat_id():
-    settings_obj = PaymentSettings.objects.first()
-    return settings_obj.admin_chat_id if settings_obj else None
-
-
 @shared_task(bind=True, autoretry_for=(Exception,), retry_kwargs={'max_retries': 3, 'countdown': 60})
-def send_telegram_message_task(self, chat_id, message, reply_markup=None):
+def send_telegram_message_task(self, chat_id, message, reply_markup=None, coalesce_key=None, generation=None):
     """Telegram orqali xabar yuborish uchun asenkron vazifa"""
-    telegram_url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage"
-
-    payload = {
-        "chat_id": chat_id,
-        "text": message,
-        "parse_mode": "HTML"
-    }
-
-    if reply_markup:
-        payload["reply_markup"] = json.dumps(reply_markup)
+    if coalesce_key and is_superseded(coalesce_key, generation):
+        # Shu kalit bilan yangiroq xabar navbatda: bu xabar eskirgan
+        logger.info(f"Telegram xabar o'tkazib yuborildi (yangisi bor): chat_id={chat_id}, key={coalesce_key}")
+        return {"success": False, "error": "Superseded"}
 
     try:
-        response = requests.post(telegram_url, data=payload, timeout=30)
-        response.raise_for_status()
+        get_dispatcher().send_message(chat_id, message, reply_markup=reply_markup)
         logger.info(f"Telegram xabar yuborildi: chat_id={chat_id}")
         return {"success": True, "chat_id": chat_id}
+    except TelegramRetryAfter as e:
+        logger.warning(f"Telegram chegarasi: chat_id={chat_id}, {e.retry_after}s dan keyin qayta yuboriladi")
+        raise self.retry(exc=e, countdown=e.retry_after)
+    except TelegramAPIError as e:
+        # Chat topilmadi, bot bloklangan va h.k. - qayta urinish foydasiz
+        logger.error(f"Telegram xabarni rad etdi: chat_id={chat_id}: {e}")
+        return {"success": False, "error": str(e)}
     except requests.RequestException as e:
         logger.error(f"Telegram xabar yuborishda xato: {e}")
         # Celery avtomatik retry qiladi
@@ -46,28 +43,20 @@ def send_telegram_message_task(self, chat_id, message, reply_markup=None):
 @shared_task(bind=True, autoretry_for=(Exception,), retry_kwargs={'max_retries': 3, 'countdown': 60})
 def send_telegram_photo_task(self, chat_id, photo_path, caption, reply_markup=None):
     """Telegram orqali rasm yuborish uchun asenkron vazifa"""
-    telegram_url = f"https://api.telegram.org/bot{settings.TELEGRAM_BOT_TOKEN}/sendPhoto"
-
     if not os.path.exists(photo_path):
         logger.error(f"Fayl mavjud emas: {photo_path}")
         return {"success": False, "error": "File not found"}
 
     try:
-        with open(photo_path, 'rb') as photo:
-            files = {'photo': photo}
-            payload = {
-                "chat_id": chat_id,
-                "caption": caption,
-                "parse_mode": "Markdown"
-            }
-
-            if reply_markup:
-                payload["reply_markup"] = json.dumps(reply_markup)
-
-            response = requests.post(telegram_url, data=payload, files=files, timeout=30)
-            response.raise_for_status()
-            logger.info(f"Telegram rasm yuborildi: chat_id={chat_id}")
-            return {"success": True, "chat_id": chat_id}
+        get_dispatcher().send_photo(chat_id, photo_path, caption, reply_markup=reply_markup)
+        logger.info(f"Telegram rasm yuborildi: chat_id={chat_id}")
+        return {"success": True, "chat_id": chat_id}
+    except TelegramRetryAfter as e:
+        logger.warning(f"Telegram chegarasi: chat_id={chat_id}, {e.retry_after}s dan keyin qayta yuboriladi")
+        raise self.retry(exc=e, countdown=e.retry_after)
+    except TelegramAPIError as e:
+        logger.error(f"Telegram rasmni rad etdi: chat_id={chat_id}: {e}")
+        return {"success": False, "error": str(e)}
     except requests.RequestException as e:
         logger.error(f"Telegram rasm yuborishda xato: {e}")
         raise self.retry(exc=e, countdown=60)
@@ -143,8 +132,17 @@ def notify_customer_status_change_task(self, order_id, old_status, new_status):
         elif new_status == 'cancelled':
             message += "\n\n❌ Afsuski, buyurtmangiz bekor qilindi. Savollar uchun bog'laning."
 
-        # Telegram xabar yuborish vazifasini chaqirish
-        return send_telegram_message_task.delay(telegram_chat_id, message)
+        if not is_cache_shared():
+            # LocMem (faqat DEBUG) da birlashtirib bo'lmaydi: har bir xabar darhol yuboriladi
+            return send_telegram_message_task.delay(telegram_chat_id, message)
+
+        # Ketma-ket status o'zgarishlarida mijozga faqat oxirgisi yuboriladi
+        coalesce_key = f"order-status:{telegram_chat_id}:{order_instance.order_id}"
+        return send_telegram_message_task.apply_async(
+            (telegram_chat_id, message),
+            {'coalesce_key': coalesce_key, 'generation': next_coalesce_generation(coalesce_key)},
+            countdown=COALESCE_DELAY,
+        )
 
     except Order.DoesNotExist:
         logger.error(f"Order topilmadi: {order_id}")
@@ -156,7 +154,6 @@ def notify_customer_status_change_task(self, order_id, old_status, new_status):
 
 @shared_task(bind=True, autoretry_for=(Exception,), retry_kwargs={'max_retries': 3, 'countdown': 60})
 def send_admin_payment_notification_task(self, order_id):
-    time.sleep(5)
     """Adminga to'lov cheki haqida asenkron xabar yuborish"""
     try:
         order_instance = Order.objects.get(pk=order_id)
@@ -236,4 +233,60 @@ def send_admin_payment_notification_task(self, order_id):
         return {"success": False, "error": "Order not found"}
     except Exception as e:
         logger.error(f"Admin xabarini yuborishda xato: {e}")
-        raise self.retry(exc=e, countdown=60)
\ No newline at end of file
+        raise self.retry(exc=e, countdown=60)
+
+
+@shared_task
+def purge_expired_sessions_task():
+    """Muddati o'tgan Django sessiyalarini bazadan o'chirish"""
+    deleted = maintenance.purge_expired_sessions()
+    logger.info(f"Muddati o'tgan sessiyalar tozalandi: {deleted} ta")
+    return deleted
+
+
+@shared_task
+def purge_expired_telegram_auth_task():
+    """Muddati tugagan TelegramAuth yozuvlarini o'chirish"""
+    deleted = maintenance.purge_expired_telegram_auth()
+    logger.info(f"Muddati tugagan TelegramAuth yozuvlari o'chirildi: {deleted} ta")
+    return deleted
+
+
+@shared_task
+def purge_orphan_session_carts_task(days=maintenance.SESSION_CART_MAX_AGE_DAYS,
+                                    batch_size=maintenance.DEFAULT_BATCH_SIZE):
+    """Egasiz eski mehmon savatlarini o'chirish"""
+    deleted = maintenance.purge_orphan_session_carts(days, batch_size)
+    logger.info(f"Egasiz mehmon savatlari o'chirildi: {deleted} ta")
+    return deleted
+
+
+@shared_task
+def purge_orphan_guest_marks_task():
+    """Sessiyasi yo'q mehmon sevimlilari va layklarini o'chirish"""
+    deleted = maintenance.purge_orphan_guest_marks()
+    logger.info(f"Egasiz mehmon belgilari o'chirildi: {deleted}")
+    return deleted
+
+
+@shared_task(bind=True, autoretry_for=(OSError,), retry_kwargs={'max_retries': 3, 'countdown': 30})
+def generate_image_variants_task(self, model_label, pk, field_name):
+    """Yuklangan rasm uchun WebP/JPEG o'lchamli variantlarni yaratish"""
+    from django.apps import apps
+    from PIL import UnidentifiedImageError
+    from .utils import generate_variants, bump_cache_version, CATALOGUE_VERSION
+
+    obj = apps.get_model(model_label).objects.filter(pk=pk).first()
+    if obj is None:
+        return {"success": False, "error": "Object not found"}
+
+    try:
+        written = generate_variants(getattr(obj, field_name))
+    except UnidentifiedImageError:
+        logger.error(f"Rasmni o'qib bo'lmadi: {model_label} #{pk} {field_name}")
+        return {"success": False, "error": "Unidentified image"}
+
+    if written:
+        # Keshdagi sahifalar endi srcset bilan qayta yaratilsin
+        bump_cache_version(CATALOGUE_VERSION)
+    return {"success": True, "written": written}
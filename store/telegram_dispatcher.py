@@ -0,0 +1,225 @@
+"""
+Telegram Bot API ga chiquvchi xabarlar (Celery vazifalari uchun).
+
+HTTP ulanishlar jarayon ichida qayta ishlatiladi va Telegram chegaralariga
+(umumiy 30 xabar/s, bitta chatga 1 xabar/s) token bucket orqali rioya
+qilinadi. Chegaralar jarayon xotirasida hisoblanadi, shuning uchun Telegram
+vazifalari alohida navbatda bitta worker jarayonida bajarilishi kerak.
+"""
+import json
+import logging
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from requests.adapters import HTTPAdapter
+
+from .utils import is_cache_shared
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_API_URL = 'https://api.telegram.org'
+
+# Telegram chegaralari (xabar/soniya)
+GLOBAL_RATE = 30
+PER_CHAT_RATE = 1
+
+# Shundan qisqa retry_after joyida kutiladi, uzunroq bo'lsa vazifa qayta navbatga qo'yiladi
+MAX_INLINE_RETRY_AFTER = 5
+MAX_INLINE_RETRIES = 3
+
+# Bir xil kalitli xabarlar shu muddat ichida kelsa faqat oxirgisi yuboriladi
+COALESCE_DELAY = 3
+COALESCE_KEY_TIMEOUT = 60 * 10
+
+# Shuncha chat bucketi to'plansa bo'sh turganlari o'chiriladi
+MAX_CHAT_BUCKETS = 10000
+
+
+class TelegramAPIError(Exception):
+    """Telegram rejected the request (unknown chat, blocked bot, bad markup); retrying won't help"""
+
+    def __init__(self, description, error_code=None):
+        super().__init__(description)
+        self.error_code = error_code
+
+
+class TelegramRetryAfter(Exception):
+    """Flood limit hit; the request may be repeated after ``retry_after`` seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Flood control exceeded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations: ``reserve()`` always takes a
+    token and returns how long the caller has to wait before using it.
+    """
+
+    def __init__(self, rate, capacity=1, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        now = self.clock()
+        self._refill(now)
+        self.tokens -= 1
+        return 0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, seconds):
+        """Hold back new tokens for ``seconds`` (after a 429 from Telegram)"""
+        self._refill(self.clock())
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+    def is_idle(self):
+        self._refill(self.clock())
+        return self.tokens >= self.capacity
+
+
+class RateLimiter:
+    """Global and per-chat token buckets shared by all threads of a process"""
+
+    def __init__(self, global_rate=GLOBAL_RATE, per_chat_rate=PER_CHAT_RATE, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.per_chat_rate = per_chat_rate
+        self.clock = clock
+        self.sleep = sleep
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate, clock=clock)
+        self.chat_buckets = {}
+        self.lock = threading.Lock()
+
+    def _chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= MAX_CHAT_BUCKETS:
+                self.chat_buckets = {key: value for key, value in self.chat_buckets.items() if not value.is_idle()}
+            bucket = self.chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, clock=self.clock)
+        return bucket
+
+    def acquire(self, chat_id):
+        """Block until a message to ``chat_id`` may be sent; returns the time waited"""
+        with self.lock:
+            wait = max(self._chat_bucket(chat_id).reserve(), self.global_bucket.reserve())
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def pause(self, chat_id, seconds):
+        with self.lock:
+            self._chat_bucket(chat_id).pause(seconds)
+
+
+class TelegramDispatcher:
+    """Sends Bot API requests over a pooled session within Telegram's rate limits"""
+
+    def __init__(self, token, base_url=None, session=None, limiter=None, timeout=30):
+        self.url = f"{(base_url or TELEGRAM_API_URL).rstrip('/')}/bot{token}"
+        self.session = session or self._create_session()
+        self.limiter = limiter or RateLimiter()
+        self.timeout = timeout
+
+    @staticmethod
+    def _create_session():
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=10))
+        session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=10))
+        return session
+
+    def call(self, method, chat_id, data, files=None):
+        """
+        POST ``method`` and return its ``result``.
+        Short flood waits are slept in place; otherwise raises
+        ``TelegramRetryAfter``, ``TelegramAPIError`` or ``requests.RequestException``.
+        """
+        for attempt in range(MAX_INLINE_RETRIES + 1):
+            self.limiter.acquire(chat_id)
+            if files:
+                for file in files.values():
+                    file.seek(0)
+            response = self.session.post(f"{self.url}/{method}", data=data, files=files, timeout=self.timeout)
+
+            try:
+                body = response.json()
+            except ValueError:
+                response.raise_for_status()
+                raise TelegramAPIError(f"Invalid response from Telegram: {response.text[:200]}")
+
+            if body.get('ok'):
+                return body.get('result')
+
+            if response.status_code == 429:
+                retry_after = body.get('parameters', {}).get('retry_after', 1)
+                self.limiter.pause(chat_id, retry_after)
+                if retry_after > MAX_INLINE_RETRY_AFTER or attempt == MAX_INLINE_RETRIES:
+                    raise TelegramRetryAfter(retry_after)
+                logger.warning(f"Telegram 429: chat_id={chat_id}, {retry_after}s kutiladi")
+                continue
+
+            if response.status_code >= 500:
+                response.raise_for_status()
+            raise TelegramAPIError(body.get('description', 'Unknown error'), body.get('error_code'))
+
+    def send_message(self, chat_id, text, parse_mode='HTML', reply_markup=None):
+        data = {'chat_id': chat_id, 'text': text, 'parse_mode': parse_mode}
+        if reply_markup:
+            data['reply_markup'] = json.dumps(reply_markup)
+        return self.call('sendMessage', chat_id, data)
+
+    def send_photo(self, chat_id, photo_path, caption, parse_mode='Markdown', reply_markup=None):
+        data = {'chat_id': chat_id, 'caption': caption, 'parse_mode': parse_mode}
+        if reply_markup:
+            data['reply_markup'] = json.dumps(reply_markup)
+        with open(photo_path, 'rb') as photo:
+            return self.call('sendPhoto', chat_id, data, files={'photo': photo})
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Process-wide dispatcher, created lazily so each Celery worker process gets its own"""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = TelegramDispatcher(
+                settings.TELEGRAM_BOT_TOKEN,
+                base_url=settings.TELEGRAM_API_BASE_URL or None,
+            )
+        return _dispatcher
+
+
+def _coalesce_cache_key(key):
+    return f'telegram:coalesce:{key}'
+
+
+def next_coalesce_generation(key):
+    """Register a new message for ``key``; older pending messages with the same key are dropped"""
+    # Hisoblagichni yuboruvchi va worker bir xil ko'rishi kerak; LocMem da worker doim None ko'radi
+    if not is_cache_shared():
+        raise ImproperlyConfigured('Telegram message coalescing needs a shared cache (REDIS_CACHE_URL)')
+    cache_key = _coalesce_cache_key(key)
+    cache.add(cache_key, 0, COALESCE_KEY_TIMEOUT)
+    try:
+        return cache.incr(cache_key)
+    except ValueError:
+        cache.set(cache_key, 1, COALESCE_KEY_TIMEOUT)
+        return 1
+
+
+def is_superseded(key, generation):
+    """True if a newer message with the same key was queued after ``generation``"""
+    current = cache.get(_coalesce_cache_key(key))
+    return current is not None and current > generation
@@ -0,0 +1,125 @@
+"""
+Lokal test uchun Telegram o'rnini bosuvchi vositalar: soxta update lar va
+Bot API stub serveri. Bot ``TELEGRAM_API_BASE_URL`` orqali stubga ulanadi.
+"""
+import itertools
+import json
+import math
+import time
+
+from aiohttp import web
+
+_ids = itertools.count(1)
+
+STUB_BOT_USER = {'id': 1, 'is_bot': True, 'first_name': 'Stub', 'username': 'stub_bot'}
+
+
+def _user(chat_id):
+    return {'id': chat_id, 'is_bot': False, 'first_name': 'Test'}
+
+
+def _chat(chat_id):
+    return {'id': chat_id, 'type': 'private', 'first_name': 'Test'}
+
+
+def _message(chat_id, **fields):
+    return {
+        'message_id': next(_ids),
+        'date': int(time.time()),
+        'chat': _chat(chat_id),
+        'from': _user(chat_id),
+        **fields,
+    }
+
+
+def start_update(chat_id, session_token):
+    """/start login_xxx deep link, as sent after clicking the site's login button"""
+    return {'update_id': next(_ids), 'message': _message(chat_id, text=f'/start {session_token}')}
+
+
+def contact_update(chat_id, phone_number):
+    """User shares their phone number with the contact button"""
+    contact = {'phone_number': phone_number, 'first_name': 'Test', 'user_id': chat_id}
+    return {'update_id': next(_ids), 'message': _message(chat_id, contact=contact)}
+
+
+def callback_update(chat_id, data):
+    """Inline button press, e.g. ``retry_code`` or ``confirm_<order_id>``"""
+    return {
+        'update_id': next(_ids),
+        'callback_query': {
+            'id': str(next(_ids)),
+            'from': _user(chat_id),
+            'chat_instance': str(chat_id),
+            'data': data,
+            'message': _message(chat_id, text='stub'),
+        },
+    }
+
+
+def _stub_message(payload):
+    return _message(int(payload.get('chat_id', 0)), text=payload.get('text', ''))
+
+
+# Bot API metodi -> javob; qolganlari uchun ``true``
+STUB_RESULTS = {
+    'getMe': lambda payload: STUB_BOT_USER,
+    'sendMessage': _stub_message,
+    'sendPhoto': _stub_message,
+    'editMessageText': _stub_message,
+}
+
+
+def _flood_response(retry_after):
+    return web.Response(
+        status=429,
+        text=json.dumps({
+            'ok': False,
+            'error_code': 429,
+            'description': f'Too Many Requests: retry after {retry_after}',
+            'parameters': {'retry_after': retry_after},
+        }),
+        content_type='application/json',
+    )
+
+
+def create_api_stub_app(per_chat_interval=None):
+    """
+    aiohttp app answering every Bot API call with ``ok``.
+    Calls are recorded in ``app['calls']`` as ``(method, payload)``.
+
+    With ``per_chat_interval`` (seconds) a second ``send*`` call to the same
+    chat within the interval gets a 429 with ``retry_after``, like Telegram;
+    rejected calls are recorded in ``app['rejected']``.
+    """
+    app = web.Application()
+    app['calls'] = []
+    app['rejected'] = []
+    last_sent = {}
+
+    async def handle(request):
+        method = request.match_info['method']
+        if request.content_type == 'application/json':
+            payload = await request.json()
+        else:
+            payload = {key: value for key, value in (await request.post()).items() if isinstance(value, str)}
+
+        if per_chat_interval and method.startswith('send'):
+            chat_id = payload.get('chat_id')
+            now = time.monotonic()
+            elapsed = now - last_sent.get(chat_id, float('-inf'))
+            if elapsed < per_chat_interval:
+                app['rejected'].append((method, payload))
+                return _flood_response(max(1, math.ceil(per_chat_interval - elapsed)))
+            last_sent[chat_id] = now
+
+        app['calls'].append((method, payload))
+
+        result = STUB_RESULTS.get(method)
+        return web.Response(
+            text=json.dumps({'ok': True, 'result': result(payload) if result else True}),
+            content_type='application/json',
+        )
+
+    app.router.add_post('/bot{token}/{method}', handle)
+    return app
@@ -0,0 +1,23 @@
+from django import template
+
+from ..utils import variant_url as _variant_url, variant_srcset as _variant_srcset
+
+register = template.Library()
+
+
+@register.filter
+def variant_url(field_file, variant):
+    """{{ product.main_image|variant_url:'card' }}"""
+    return _variant_url(field_file, variant)
+
+
+@register.filter
+def variant_jpeg_url(field_file, variant):
+    """{{ product.main_image|variant_jpeg_url:'card' }} - WebP qo'llamaydigan brauzerlar uchun"""
+    return _variant_url(field_file, variant, fmt='jpeg')
+
+
+@register.filter
+def srcset(field_file):
+    """{{ product.main_image|srcset }}"""
+    return _variant_srcset(field_file)
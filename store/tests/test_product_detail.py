@@ -0,0 +1,99 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import translation
+
+from store.models import (
+    Brand, CarModel, Category, ExchangeRate, Product, ProductComment, ProductImage, ProductLike
+)
+
+# Mahsulot, rasmlar, mos modellar, sharhlar, javoblar, kurs, o'xshash mahsulotlar, kategoriyalar.
+# Rasm, sharh va o'xshash mahsulotlar soniga bog'liq bo'lmasligi kerak.
+PRODUCT_DETAIL_QUERIES = 8
+
+
+class ProductDetailQueryBudgetTest(TestCase):
+    """product_detail renders a busy product in a fixed number of queries"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = Category.objects.create(name='Filters', slug='filters')
+        brand = Brand.objects.create(name='Chevrolet', slug='chevrolet')
+        cls.product = Product.objects.create(
+            name='Oil filter', name_uz='Oil filter', slug='oil-filter', category=category,
+            description='Filter', price_usd=10, stock_quantity=5, main_image='products/filter.jpg',
+        )
+        cls.product.compatible_models.set([
+            CarModel.objects.create(brand=brand, name=f'Model {index}', slug=f'model-{index}')
+            for index in range(3)
+        ])
+        # O'xshash mahsulotlar: har birining narxi so'mda ko'rsatiladi
+        Product.objects.bulk_create([
+            Product(name=f'Air filter {index}', name_uz=f'Air filter {index}', slug=f'air-filter-{index}',
+                    category=category, description='Filter', price_usd=8, main_image='products/air.jpg')
+            for index in range(6)
+        ])
+
+        ProductImage.objects.bulk_create([
+            ProductImage(product=cls.product, image=f'products/filter-{index}.jpg', is_primary=index == 0)
+            for index in range(10)
+        ])
+        users = User.objects.bulk_create([User(username=f'customer{index}') for index in range(6)])
+        ExchangeRate.objects.create(usd_to_uzs=12650, created_by=users[0])
+        ProductLike.objects.bulk_create([ProductLike(user=user, product=cls.product) for user in users])
+        for user in users:
+            comment = ProductComment.objects.create(
+                product=cls.product, user=user, comment='Good', rating=5
+            )
+            ProductComment.objects.bulk_create([
+                ProductComment(product=cls.product, user=reply_user, parent=comment, comment='Agree')
+                for reply_user in users[:3]
+            ])
+
+    def setUp(self):
+        # Sahifa keshi so'rovlarni yashirmasligi uchun
+        cache.clear()
+
+    def test_query_budget(self):
+        with translation.override('uz'):
+            url = reverse('product_detail', kwargs={'slug': self.product.slug})
+
+        with self.assertNumQueries(PRODUCT_DETAIL_QUERIES):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['product'].images.all()), 10)
+        self.assertEqual(len(response.context['comments']), 4)
+        self.assertEqual(response.context['product'].likes_total, 6)
+        self.assertEqual(len(response.context['related_products']), 6)
+
+    def test_query_budget_does_not_grow_with_images_and_comments(self):
+        ProductImage.objects.bulk_create([
+            ProductImage(product=self.product, image=f'products/extra-{index}.jpg') for index in range(10)
+        ])
+        user = User.objects.create(username='late')
+        comment = ProductComment.objects.create(product=self.product, user=user, comment='Late', rating=4)
+        ProductComment.objects.create(product=self.product, user=user, parent=comment, comment='Reply')
+
+        with translation.override('uz'):
+            url = reverse('product_detail', kwargs={'slug': self.product.slug})
+
+        with self.assertNumQueries(PRODUCT_DETAIL_QUERIES):
+            self.client.get(url)
+
+    def test_aggregate_rating_covers_every_rated_comment(self):
+        # Eng yangi 4 ta sharhning o'rtachasi 3.75 bo'lardi; javoblarda baho yo'q
+        comments = ProductComment.objects.filter(product=self.product, parent__isnull=True).order_by('pk')
+        for comment, rating in zip(comments, [1, 2, 3, 4, 5, 3]):
+            comment.rating = rating
+            comment.save()
+
+        with translation.override('uz'):
+            response = self.client.get(reverse('product_detail', kwargs={'slug': self.product.slug}))
+
+        structured = json.loads(response.context['seo']['json_ld'])
+        self.assertEqual(structured['aggregateRating']['ratingValue'], '3.0')
+        self.assertEqual(structured['aggregateRating']['reviewCount'], '6')
@@ -0,0 +1,25 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from store.management.commands.check_query_plans import (
+    DEFAULT_SEED_ROWS, analyze, key_queries, scans_whole_table, seed
+)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Query plans are checked on PostgreSQL only')
+class KeyQueryPlanTest(TestCase):
+    """Hot Product/Order/TelegramAuth queries are served by an index (see check_query_plans)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Buyruq bilan bir xil hajm: kichik jadvallarda rejalashtiruvchi seq scan ni afzal ko'radi
+        seed(DEFAULT_SEED_ROWS)
+        analyze()
+
+    def test_key_queries_use_an_index(self):
+        for label, table, queryset in key_queries():
+            with self.subTest(label):
+                plan = queryset.explain()
+                self.assertFalse(scans_whole_table(plan, table), f'{label}:\n{plan}')
@@ -1,24 +1,10 @@
 from django.urls import path, re_path, include
 from . import views
 from . import signals
-from django.views.generic import TemplateView
-from django.contrib.sitemaps.views import sitemap
-from .sitemaps import StaticViewSitemap, ProductSitemap, BrandSitemap
-
-
-sitemaps_dict = {
-    "static": StaticViewSitemap,
-    "products": ProductSitemap,
-    "brands": BrandSitemap,
-
-}
 
 
 urlpatterns = [
-    path("robots.txt", TemplateView.as_view(
-        template_name="robots.txt", content_type="text/plain")),
-
-    path("sitemap.xml", sitemap, {"sitemaps": sitemaps_dict}, name="sitemap"),
+    path("robots.txt", views.robots_txt),
 
     path('', views.home, name='home'),
     path('products/', views.product_list, name='product_list'),
@@ -53,6 +39,7 @@ urlpatterns = [
     path('ajax/sync-favorites/', views.ajax_sync_favorites, name='ajax_sync_favorites'),
     path('ajax/clear-session-cart/', views.ajax_clear_session_cart, name='ajax_clear_session_cart'),
     path('ajax/clear-session-favorites/', views.ajax_clear_session_favorites, name='ajax_clear_session_favorites'),
+    path('ajax/header-counts/', views.ajax_header_counts, name='ajax_header_counts'),
 
     # API endpoints for delivery
     path('api/', include('store.api_urls')),
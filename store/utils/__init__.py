@@ -1,10 +1,50 @@
-from .address_utils import get_regions, get_branches, get_branches_by_region, get_branch_by_id
-from .exchange_utils import get_latest_exchange_rate
+from .address_utils import get_regions, get_branches, get_branches_by_region, get_branch_by_id, get_branch_map
+from .cart_utils import merge_cart_items
+from .exchange_utils import get_latest_exchange_rate, get_active_usd_to_uzs, invalidate_exchange_rate
+from .guest_utils import (
+    toggle_guest_mark, get_guest_favorites_count, clear_guest_favorites, merge_guest_marks_to_user
+)
+from .image_utils import (
+    IMAGE_FIELDS, generate_variants, has_variants, variant_url, variant_srcset, normalize_uploaded_image
+)
+from .payment_utils import (
+    get_payment_settings, get_admin_chat_id, aget_admin_chat_id, invalidate_payment_settings
+)
+from .order_events import order_change_events, record_order_events, payment_confirmation_report
+from .page_cache import (
+    anonymous_page_cache, bump_cache_version, is_cache_shared, EXCHANGE_RATE_VERSION, CATALOGUE_VERSION
+)
 
 __all__ = [
     'get_regions',
     'get_branches',
     'get_branches_by_region',
     'get_branch_by_id',
+    'get_branch_map',
+    'merge_cart_items',
     'get_latest_exchange_rate',
+    'get_active_usd_to_uzs',
+    'invalidate_exchange_rate',
+    'toggle_guest_mark',
+    'get_guest_favorites_count',
+    'clear_guest_favorites',
+    'merge_guest_marks_to_user',
+    'IMAGE_FIELDS',
+    'generate_variants',
+    'has_variants',
+    'variant_url',
+    'variant_srcset',
+    'normalize_uploaded_image',
+    'get_payment_settings',
+    'get_admin_chat_id',
+    'aget_admin_chat_id',
+    'invalidate_payment_settings',
+    'order_change_events',
+    'record_order_events',
+    'payment_confirmation_report',
+    'anonymous_page_cache',
+    'bump_cache_version',
+    'is_cache_shared',
+    'EXCHANGE_RATE_VERSION',
+    'CATALOGUE_VERSION',
 ]
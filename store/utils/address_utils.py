@@ -5,11 +5,29 @@ from pathlib import Path
 
 CSV_FILE = Path(__file__).parent.parent.parent / 'manzillar.csv'
 
+# Jarayon xotirasidagi nusxa: fayl o'zgarganda (mtime) qayta o'qiladi
+_delivery_data = {'mtime': None, 'data': ({}, {})}
+
+
 def load_delivery_data():
-    """Load delivery data from CSV file"""
-    if not CSV_FILE.exists():
+    """
+    Delivery data from the CSV file as ``(regions, branches)``, parsed once
+    per process and re-read only when the file changes. The returned dicts
+    are shared; callers must not modify them.
+    """
+    try:
+        mtime = CSV_FILE.stat().st_mtime
+    except OSError:
         return {}, {}
-    
+
+    if _delivery_data['mtime'] != mtime:
+        _delivery_data['data'] = _parse_delivery_csv()
+        _delivery_data['mtime'] = mtime
+    return _delivery_data['data']
+
+
+def _parse_delivery_csv():
+    """Parse the CSV file into ``(regions, branches)``"""
     regions = {}  # region_name -> list of branches
     branches = {}  # branch_id -> branch_data
     
@@ -74,8 +92,7 @@ def get_branches(region=None):
         return get_branches_by_region(region)
     
     # Return all branches
-    _, branches = load_delivery_data()
-    return list(branches.values())
+    return list(get_branch_map().values())
 
 
 def get_branches_by_region(region_name):
@@ -88,3 +105,9 @@ def get_branch_by_id(branch_id):
     """Get branch details by ID"""
     _, branches = load_delivery_data()
     return branches.get(str(branch_id))
+
+
+def get_branch_map():
+    """``{branch_id: branch}`` for resolving many orders without per-row lookups"""
+    _, branches = load_delivery_data()
+    return branches
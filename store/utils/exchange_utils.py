@@ -1,5 +1,12 @@
+from django.core.cache import cache
+
 from ..models import ExchangeRate
 
+ACTIVE_EXCHANGE_RATE_CACHE_KEY = 'exchange_rate:active'
+# Saqlashda signal orqali tozalanadi; muddat faqat ehtiyot uchun
+ACTIVE_EXCHANGE_RATE_CACHE_TIMEOUT = 60 * 60
+
+
 def get_latest_exchange_rate():
     """
     Returns the latest active exchange rate or None if not found
@@ -9,3 +16,23 @@ def get_latest_exchange_rate():
         return float(rate.usd_to_uzs) if rate else None
     except (AttributeError, ValueError, ExchangeRate.DoesNotExist):
         return None
+
+
+def get_active_usd_to_uzs():
+    """
+    ``usd_to_uzs`` of the active ExchangeRate, or None if there is none.
+    Cached, so pages pricing many products query the rate once.
+    """
+    # (qiymat,) ko'rinishida saqlanadi: kurs yo'qligi ham keshlanadi
+    cached = cache.get(ACTIVE_EXCHANGE_RATE_CACHE_KEY)
+    if cached is None:
+        try:
+            cached = (ExchangeRate.objects.get(is_active=True).usd_to_uzs,)
+        except ExchangeRate.DoesNotExist:
+            cached = (None,)
+        cache.set(ACTIVE_EXCHANGE_RATE_CACHE_KEY, cached, ACTIVE_EXCHANGE_RATE_CACHE_TIMEOUT)
+    return cached[0]
+
+
+def invalidate_exchange_rate():
+    cache.delete(ACTIVE_EXCHANGE_RATE_CACHE_KEY)
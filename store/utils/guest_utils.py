@@ -0,0 +1,72 @@
+from ..models import Favorite, GuestFavorite, GuestLike, Product, ProductLike
+from .page_cache import bump_cache_version, CATALOGUE_VERSION
+
+
+def toggle_guest_mark(model, session_key, product):
+    """
+    Add or remove a guest favorite/like row.
+    Returns True if the product is now marked, False if it was unmarked.
+    """
+    deleted, _ = model.objects.filter(session_key=session_key, product=product).delete()
+    if deleted:
+        return False
+    model.objects.get_or_create(session_key=session_key, product=product)
+    return True
+
+
+def get_guest_favorites_count(session_key):
+    """Number of favorites stored for a guest session"""
+    if not session_key:
+        return 0
+    return GuestFavorite.objects.filter(session_key=session_key).count()
+
+
+def clear_guest_favorites(session_key):
+    """Remove all favorites of a guest session"""
+    if session_key:
+        GuestFavorite.objects.filter(session_key=session_key).delete()
+
+
+def merge_guest_marks_to_user(session_key, user, extra_favorite_ids=()):
+    """
+    Move a guest session's favorites and likes to the user in bulk.
+
+    Runs a fixed number of queries regardless of how many products the
+    guest marked. ``extra_favorite_ids`` covers ids still held in old
+    session payloads. Returns the number of favorites handed over.
+    """
+    favorite_ids = set(
+        GuestFavorite.objects.filter(session_key=session_key).values_list('product_id', flat=True)
+    ) if session_key else set()
+    for product_id in extra_favorite_ids:
+        try:
+            favorite_ids.add(int(product_id))
+        except (TypeError, ValueError):
+            continue
+
+    like_ids = list(
+        GuestLike.objects.filter(session_key=session_key).values_list('product_id', flat=True)
+    ) if session_key else []
+
+    if extra_favorite_ids:
+        # Eski sessiyalardagi id lar o'chirilgan mahsulotga tegishli bo'lishi mumkin
+        favorite_ids = set(Product.objects.filter(pk__in=favorite_ids).values_list('pk', flat=True))
+
+    if favorite_ids:
+        Favorite.objects.bulk_create(
+            [Favorite(user=user, product_id=product_id) for product_id in favorite_ids],
+            ignore_conflicts=True,
+        )
+    if like_ids:
+        ProductLike.objects.bulk_create(
+            [ProductLike(user=user, product_id=product_id) for product_id in like_ids],
+            ignore_conflicts=True,
+        )
+        # bulk_create signal yubormaydi; layklar soni keshlangan sahifalarda ko'rinadi
+        bump_cache_version(CATALOGUE_VERSION)
+
+    if session_key:
+        GuestFavorite.objects.filter(session_key=session_key).delete()
+        GuestLike.objects.filter(session_key=session_key).delete()
+
+    return len(favorite_ids)
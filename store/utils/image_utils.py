@@ -0,0 +1,231 @@
+import hashlib
+import json
+import logging
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+# Variant nomi -> eng katta tomon (px). Asl rasmdan katta qilinmaydi.
+IMAGE_VARIANTS = {
+    'thumb': 120,   # admin va galereya kichik rasmlari
+    'card': 400,    # mahsulot kartochkalari
+    'detail': 800,  # mahsulot sahifasidagi asosiy rasm
+    'zoom': 1600,   # kattalashtirish
+}
+
+# Format -> (Pillow formati, fayl kengaytmasi, saqlash parametrlari)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# srcset uchun ishlatiladigan variantlar
+SRCSET_VARIANTS = ('card', 'detail', 'zoom')
+
+# To'lov cheklari shu o'lchamdan kattaroq saqlanmaydi (Telegram uchun ham yetarli)
+PAYMENT_SCREENSHOT_MAX_DIMENSION = 1600
+PAYMENT_SCREENSHOT_QUALITY = 85
+
+# Rasm maydonlari: model nomi -> maydonlar
+IMAGE_FIELDS = {
+    'store.Product': ('main_image',),
+    'store.ProductImage': ('image',),
+    'store.Banner': ('image',),
+    'store.Brand': ('logo',),
+    'store.Category': ('image',),
+}
+
+
+def variant_name(name, variant, fmt='webp'):
+    """
+    Storage name of a variant, stored next to the original:
+    ``a/b.png`` -> ``a/b.png__card.webp``. The original extension is kept
+    so ``b.jpg`` and ``b.png`` in the same folder do not share variants.
+    """
+    return f"{name}__{variant}.{VARIANT_FORMATS[fmt][1]}"
+
+
+def manifest_name(name):
+    """Sidecar file written after all variants of ``name`` are stored"""
+    return f"{name}__variants.json"
+
+
+def variants_signature():
+    """Changes whenever sizes or encoder settings change, so old variants get rebuilt"""
+    spec = json.dumps([IMAGE_VARIANTS, VARIANT_FORMATS], sort_keys=True)
+    return hashlib.sha1(spec.encode()).hexdigest()[:12]
+
+
+def file_digest(storage, name):
+    digest = hashlib.sha1()
+    with storage.open(name, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_manifest(storage, name):
+    try:
+        with storage.open(manifest_name(name), 'rb') as f:
+            return json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(storage, name, manifest):
+    path = manifest_name(name)
+    if storage.exists(path):
+        storage.delete(path)
+    storage.save(path, ContentFile(json.dumps(manifest).encode()))
+
+
+def _modified_time(storage, name):
+    try:
+        return storage.get_modified_time(name).timestamp()
+    except (NotImplementedError, OSError):
+        return None
+
+
+def is_up_to_date(storage, name):
+    """
+    True if the stored variants match the current original and variant spec.
+    The mtime check is free; the content hash is only computed when the
+    original was touched, and a matching hash just refreshes the manifest.
+    """
+    manifest = _read_manifest(storage, name)
+    if not manifest or manifest.get('signature') != variants_signature():
+        return False
+
+    mtime = _modified_time(storage, name)
+    if mtime is not None and manifest.get('mtime') == mtime:
+        return True
+
+    if manifest.get('sha1') != file_digest(storage, name):
+        return False
+    _write_manifest(storage, name, dict(manifest, mtime=mtime))
+    return True
+
+
+def has_variants(field_file):
+    """
+    True if derivatives of ``field_file`` have been generated. The storage
+    is asked once per field file; the answer is kept on it for later
+    filter calls (card, srcset, thumbnails) until the file name changes.
+    """
+    if not field_file or not field_file.name:
+        return False
+    checked = getattr(field_file, '_variants_checked', None)
+    if checked is None or checked[0] != field_file.name:
+        checked = (field_file.name, field_file.storage.exists(manifest_name(field_file.name)))
+        field_file._variants_checked = checked
+    return checked[1]
+
+
+def variant_url(field_file, variant, fmt='webp'):
+    """URL of a variant, or of the original if variants are not generated yet"""
+    if not field_file or not field_file.name:
+        return ''
+    if has_variants(field_file):
+        return field_file.storage.url(variant_name(field_file.name, variant, fmt))
+    return field_file.url
+
+
+def variant_srcset(field_file, fmt='webp'):
+    """``srcset`` value with the card/detail/zoom widths, empty if not generated"""
+    if not has_variants(field_file):
+        return ''
+    storage = field_file.storage
+    return ', '.join(
+        f"{storage.url(variant_name(field_file.name, variant, fmt))} {IMAGE_VARIANTS[variant]}w"
+        for variant in SRCSET_VARIANTS
+    )
+
+
+def _encode(image, fmt, **overrides):
+    # Metadata (EXIF va h.k.) qayta yozilmaydi
+    pil_format, _, options = VARIANT_FORMATS[fmt]
+    if pil_format == 'JPEG' and image.mode != 'RGB':
+        # JPEG shaffoflikni qo'llamaydi: oq fon ustiga qo'yiladi
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        rgba = image.convert('RGBA')
+        background.paste(rgba, mask=rgba.split()[-1])
+        image = background
+    elif image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **dict(options, **overrides))
+    return buffer.getvalue()
+
+
+def render_variants(source):
+    """
+    Yield ``(variant, fmt, bytes)`` for every derivative of an open image.
+    Kept free of storage access so it can run in worker processes.
+    """
+    with Image.open(source) as original:
+        original = ImageOps.exif_transpose(original)
+        for variant, size in IMAGE_VARIANTS.items():
+            resized = original.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            for fmt in VARIANT_FORMATS:
+                yield variant, fmt, _encode(resized, fmt)
+
+
+def normalize_uploaded_image(uploaded_file, max_dimension=PAYMENT_SCREENSHOT_MAX_DIMENSION,
+                             quality=PAYMENT_SCREENSHOT_QUALITY):
+    """
+    Re-encode an uploaded photo as a metadata-free JPEG no larger than
+    ``max_dimension`` on either side, rotated according to its EXIF
+    orientation. JPEG sources are decoded at reduced scale, so large phone
+    photos are never fully loaded into memory.
+    Raises ``PIL.UnidentifiedImageError`` if the upload is not an image and
+    ``PIL.Image.DecompressionBombError`` if its pixel count is implausibly large.
+    """
+    uploaded_file.seek(0)
+    with Image.open(uploaded_file) as image:
+        if image.format == 'JPEG':
+            image.draft('RGB', (max_dimension, max_dimension))
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        data = _encode(image, 'jpeg', quality=quality)
+
+    stem, _ = os.path.splitext(os.path.basename(uploaded_file.name))
+    return ContentFile(data, name=f"{stem}.jpg")
+
+
+def generate_variants_for_name(storage, name, force=False):
+    """
+    Generate and store all variants of the file ``name`` next to it.
+    Returns the number of variant files written (0 if already up to date).
+    """
+    if not force and is_up_to_date(storage, name):
+        return 0
+
+    written = 0
+    with storage.open(name, 'rb') as source:
+        for variant, fmt, data in render_variants(source):
+            path = variant_name(name, variant, fmt)
+            if storage.exists(path):
+                storage.delete(path)
+            storage.save(path, ContentFile(data))
+            written += 1
+
+    _write_manifest(storage, name, {
+        'signature': variants_signature(),
+        'sha1': file_digest(storage, name),
+        'mtime': _modified_time(storage, name),
+    })
+    logger.info(f"Rasm variantlari yaratildi: {name} ({written} ta fayl)")
+    return written
+
+
+def generate_variants(field_file, force=False):
+    """Generate and store all variants of ``field_file``, see ``generate_variants_for_name``"""
+    if not field_file or not field_file.name:
+        return 0
+    return generate_variants_for_name(field_file.storage, field_file.name, force=force)
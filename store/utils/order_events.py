@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.db.models import F, Window
+from django.db.models.functions import Lag
+from django.utils import timezone
+
+from ..models import OrderEvent
+
+# Hisobotda ko'rsatiladigan eng sekin tasdiqlangan buyurtmalar soni
+SLOWEST_CONFIRMATIONS = 10
+
+
+def order_change_events(order, created, changed, update_fields=None):
+    """
+    Unsaved ``OrderEvent`` rows for one save of ``order``; ``changed`` is
+    ``order.get_changed_fields(update_fields)``.
+    """
+    def event(event_type, old_value='', new_value=''):
+        return OrderEvent(order=order, type=event_type, source=order.event_source,
+                          old_value=old_value or '', new_value=new_value or '')
+
+    if created:
+        return [event(OrderEvent.CREATED, new_value=order.status)]
+
+    events = []
+    if 'status' in changed:
+        events.append(event(OrderEvent.STATUS_CHANGED, changed['status'], order.status))
+    if 'payment_confirmed' in changed:
+        events.append(event(
+            OrderEvent.PAYMENT_CONFIRMED if order.payment_confirmed else OrderEvent.PAYMENT_CANCELLED
+        ))
+    if update_fields and 'payment_screenshot' in update_fields and order.payment_screenshot:
+        events.append(event(OrderEvent.SCREENSHOT_UPLOADED))
+    return events
+
+
+def record_order_events(events):
+    """Append events in one INSERT"""
+    if events:
+        OrderEvent.objects.bulk_create(events)
+    return len(events)
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def payment_confirmation_report(days=30):
+    """
+    How long uploaded payment screenshots waited for confirmation.
+
+    Each confirmation is paired with the event right before it in the same
+    order by a ``LAG()`` window, so a re-uploaded screenshot restarts the
+    clock. Durations are in minutes.
+    """
+    since = timezone.now() - timedelta(days=days)
+    per_order = {'partition_by': [F('order_id')], 'order_by': [F('created_at').asc(), F('pk').asc()]}
+    pairs = (OrderEvent.objects
+             .filter(type__in=[OrderEvent.SCREENSHOT_UPLOADED, OrderEvent.PAYMENT_CONFIRMED],
+                     created_at__gte=since)
+             .annotate(previous_type=Window(Lag('type'), **per_order),
+                       previous_at=Window(Lag('created_at'), **per_order))
+             # Oyna ustidagi shart tashqi so'rovda bajariladi
+             .filter(previous_type=OrderEvent.SCREENSHOT_UPLOADED)
+             .values_list('order_id', 'type', 'source', 'previous_at', 'created_at'))
+
+    confirmations = [
+        {
+            'order_id': order_id,
+            'source': source,
+            'uploaded_at': uploaded_at,
+            'confirmed_at': confirmed_at,
+            'minutes': (confirmed_at - uploaded_at).total_seconds() / 60,
+        }
+        for order_id, event_type, source, uploaded_at, confirmed_at in pairs
+        if event_type == OrderEvent.PAYMENT_CONFIRMED
+    ]
+
+    durations = sorted(item['minutes'] for item in confirmations)
+    summary = {'count': len(durations), 'days': days}
+    if durations:
+        summary.update({
+            'average': sum(durations) / len(durations),
+            'median': _percentile(durations, 0.5),
+            'p95': _percentile(durations, 0.95),
+            'max': durations[-1],
+        })
+
+    return {
+        'summary': summary,
+        'slowest': sorted(confirmations, key=lambda item: item['minutes'], reverse=True)[:SLOWEST_CONFIRMATIONS],
+    }
@@ -0,0 +1,106 @@
+import hashlib
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+from django.utils import translation
+from django.utils.encoding import iri_to_uri
+from django.utils.http import urlencode
+
+PAGE_CACHE_PREFIX = 'page_cache'
+
+# Versiya nomlari: kurs o'zgarsa narxlar, katalog o'zgarsa mahsulotlar eskiradi
+EXCHANGE_RATE_VERSION = 'exchange_rate'
+CATALOGUE_VERSION = 'catalogue'
+
+# Keshlangan sahifalar o'qiydigan GET parametrlari; qolganlari (utm, ?x=1 ...) kalitga kirmaydi
+PAGE_CACHE_QUERY_PARAMS = ('category', 'brand', 'model', 'sort', 'page')
+
+
+def is_cache_shared():
+    """True when the default cache is seen by every process (not LocMem/Dummy)"""
+    return not isinstance(caches['default'], (LocMemCache, DummyCache))
+
+
+def _version_key(name):
+    return f'{PAGE_CACHE_PREFIX}:version:{name}'
+
+
+def get_cache_version(name):
+    """Return the current version number for the given cache namespace"""
+    return cache.get_or_set(_version_key(name), 1, None)
+
+
+def bump_cache_version(name):
+    """Invalidate every cached page built with the given namespace version"""
+    try:
+        cache.incr(_version_key(name))
+    except ValueError:
+        cache.set(_version_key(name), 2, None)
+
+
+def get_page_cache_key(request):
+    """
+    Cache key for a page: path, the known query parameters, active
+    language and data versions. Unknown parameters do not change what the
+    views render, so they do not get their own copy.
+    """
+    params = sorted(
+        (name, request.GET[name]) for name in PAGE_CACHE_QUERY_PARAMS if request.GET.get(name)
+    )
+    url = hashlib.md5(iri_to_uri(f'{request.path}?{urlencode(params)}').encode()).hexdigest()
+    return '{}:{}:{}:r{}:c{}'.format(
+        PAGE_CACHE_PREFIX,
+        url,
+        translation.get_language(),
+        get_cache_version(EXCHANGE_RATE_VERSION),
+        get_cache_version(CATALOGUE_VERSION),
+    )
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Erkin matnli qidiruv va raqam bo'lmagan sahifa cheksiz kalit yaratardi
+    if request.GET.get('search') or not request.GET.get('page', '1').isdigit():
+        return False
+    # Flash xabarlar bor sahifa keshga tushmasligi kerak
+    return not len(get_messages(request))
+
+
+def anonymous_page_cache(view_func):
+    """
+    Full-page cache for anonymous catalogue pages.
+
+    Cart/favorites counters are not part of the page for guests; they are
+    hydrated in the browser from ``ajax_header_counts``.
+    """
+    @wraps(view_func)
+    def _wrapped_view(request, *args, **kwargs):
+        if not _is_cacheable_request(request):
+            return view_func(request, *args, **kwargs)
+
+        cache_key = get_page_cache_key(request)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            content, content_type = cached
+            response = HttpResponse(content, content_type=content_type)
+            response['X-Page-Cache'] = 'HIT'
+            return response
+
+        response = view_func(request, *args, **kwargs)
+        if response.status_code == 200 and not response.streaming:
+            cache.set(
+                cache_key,
+                (response.content, response['Content-Type']),
+                settings.PAGE_CACHE_TIMEOUT,
+            )
+            response['X-Page-Cache'] = 'MISS'
+        return response
+    return _wrapped_view
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+
+from ..models import PaymentSettings
+from .page_cache import is_cache_shared
+
+PAYMENT_SETTINGS_CACHE_KEY = 'payment_settings'
+# Saqlashda signal orqali tozalanadi; muddat faqat ehtiyot uchun
+PAYMENT_SETTINGS_CACHE_TIMEOUT = 60 * 60
+# LocMem da (faqat DEBUG) signal boshqa jarayonlardagi nusxani tozalamaydi: bot va Celery
+# yangi admin_chat_id ni ko'pi bilan shu vaqtdan keyin ko'radi
+LOCAL_PAYMENT_SETTINGS_CACHE_TIMEOUT = 30
+
+
+def _cache_timeout():
+    return PAYMENT_SETTINGS_CACHE_TIMEOUT if is_cache_shared() else LOCAL_PAYMENT_SETTINGS_CACHE_TIMEOUT
+
+
+def _build_payment_settings(latest, active):
+    # admin_chat_id avvalgidek eng oxirgi yozuvdan olinadi (faol bo'lmasa ham)
+    return {
+        'active': active,
+        'admin_chat_id': latest.admin_chat_id if latest else None,
+    }
+
+
+def _load_payment_settings():
+    latest = PaymentSettings.objects.first()
+    active = latest if latest and latest.is_active else PaymentSettings.objects.filter(is_active=True).first()
+    return _build_payment_settings(latest, active)
+
+
+async def _aload_payment_settings():
+    latest = await PaymentSettings.objects.afirst()
+    if latest and latest.is_active:
+        active = latest
+    else:
+        active = await PaymentSettings.objects.filter(is_active=True).afirst()
+    return _build_payment_settings(latest, active)
+
+
+def _cached_payment_settings():
+    cached = cache.get(PAYMENT_SETTINGS_CACHE_KEY)
+    if cached is None:
+        cached = _load_payment_settings()
+        cache.set(PAYMENT_SETTINGS_CACHE_KEY, cached, _cache_timeout())
+    return cached
+
+
+def get_payment_settings():
+    """Active PaymentSettings (cached), or None"""
+    return _cached_payment_settings()['active']
+
+
+def get_admin_chat_id():
+    """Telegram admin chat id from the latest PaymentSettings (cached), or None"""
+    return _cached_payment_settings()['admin_chat_id']
+
+
+async def aget_admin_chat_id():
+    """Async version of ``get_admin_chat_id`` for the bot"""
+    cached = await cache.aget(PAYMENT_SETTINGS_CACHE_KEY)
+    if cached is None:
+        cached = await _aload_payment_settings()
+        await cache.aset(PAYMENT_SETTINGS_CACHE_KEY, cached, _cache_timeout())
+    return cached['admin_chat_id']
+
+
+def invalidate_payment_settings():
+    """Drop the cached settings; called whenever a PaymentSettings row changes"""
+    cache.delete(PAYMENT_SETTINGS_CACHE_KEY)
@@ -2,4 +2,5 @@ from .ajaax_view import *
 from .home_view import *
 from .login_view import *
 from .order_view import *
+from .seo_view import *
 # from .test import *
@@ -3,11 +3,14 @@ import json
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 from functools import wraps
 
-from store.models import Product, ProductLike, Cart, CartItem, Favorite
+from store.models import Product, ProductLike, Cart, CartItem, Favorite, GuestFavorite, GuestLike
+from store.utils import toggle_guest_mark, get_guest_favorites_count, clear_guest_favorites, merge_cart_items
 
 
 def cleanup_session_cart(request):
@@ -51,20 +54,11 @@ def ajax_like_product(request):
                 else:
                     liked = True
             else:
-                # For guest users, store in session
+                # For guest users, store against the session key
                 if not request.session.session_key:
                     request.session.create()
 
-                likes = request.session.get('likes', [])
-                if product_id in likes:
-                    likes.remove(product_id)
-                    liked = False
-                else:
-                    likes.append(product_id)
-                    liked = True
-
-                request.session['likes'] = likes
-                request.session.modified = True
+                liked = toggle_guest_mark(GuestLike, request.session.session_key, product)
 
             return JsonResponse({
                 'success': True,
@@ -98,23 +92,14 @@ def ajax_favorite_product(request):
                 # Get updated favorites count
                 favorites_count = Favorite.objects.filter(user=request.user).count()
             else:
-                # For guest users, store in session
+                # For guest users, store against the session key
                 if not request.session.session_key:
                     request.session.create()
 
-                favorites = request.session.get('favorites', [])
-                if str(product_id) in favorites:
-                    favorites.remove(str(product_id))
-                    favorited = False
-                else:
-                    favorites.append(str(product_id))
-                    favorited = True
-
-                request.session['favorites'] = favorites
-                request.session.modified = True
+                favorited = toggle_guest_mark(GuestFavorite, request.session.session_key, product)
 
                 # Get updated favorites count
-                favorites_count = len(favorites)
+                favorites_count = get_guest_favorites_count(request.session.session_key)
 
             return JsonResponse({
                 'success': True,
@@ -191,38 +176,17 @@ def ajax_sync_cart(request):
     try:
         cart_data = json.loads(request.POST.get('cart', '{}'))
         cart, created = Cart.objects.get_or_create(user=request.user)
-        items_added = 0
-        items_updated = 0
 
+        quantities = {}
         for product_id_str, quantity in cart_data.items():
             try:
-                product_id = int(product_id_str)
-                product = Product.objects.get(id=product_id)
-
-                cart_item, item_created = CartItem.objects.get_or_create(
-                    cart=cart,
-                    product=product,
-                    defaults={'quantity': 0}
-                )
-                
-                # Merge quantities (add localStorage quantity to existing quantity)
-                new_quantity = cart_item.quantity + quantity
-                if new_quantity > product.stock_quantity:
-                    new_quantity = product.stock_quantity
-                    
-                cart_item.quantity = new_quantity
-                if cart_item.quantity > 0:
-                    cart_item.save()
-                    if item_created:
-                        items_added += 1
-                    else:
-                        items_updated += 1
-                elif not item_created:
-                    cart_item.delete()
-                    
-            except (Product.DoesNotExist, ValueError):
+                quantities[int(product_id_str)] = int(quantity)
+            except (TypeError, ValueError):
                 continue  # Skip invalid product IDs
 
+        # Merge quantities (add localStorage quantity to existing quantity)
+        items_added, items_updated = merge_cart_items(cart, quantities)
+
         return JsonResponse({
             'success': True,
             'cart_total': cart.total_items,
@@ -239,21 +203,27 @@ def ajax_sync_cart(request):
 def ajax_sync_favorites(request):
     try:
         favorites_data = json.loads(request.POST.get('favorites', '[]'))
-        favorites_added = 0
-        
+        product_ids = set()
         for product_id in favorites_data:
             try:
-                product = Product.objects.get(id=product_id)
-                favorite, created = Favorite.objects.get_or_create(user=request.user, product=product)
-                if created:
-                    favorites_added += 1
-            except Product.DoesNotExist:
+                product_ids.add(int(product_id))
+            except (TypeError, ValueError):
                 continue  # Skip invalid product IDs
 
+        product_ids = set(Product.objects.filter(id__in=product_ids).values_list('id', flat=True))
+        existing = set(
+            Favorite.objects.filter(user=request.user, product_id__in=product_ids).values_list('product_id', flat=True)
+        )
+        new_ids = product_ids - existing
+        Favorite.objects.bulk_create(
+            [Favorite(user=request.user, product_id=product_id) for product_id in new_ids],
+            ignore_conflicts=True,
+        )
+
         return JsonResponse({
             'success': True,
-            'favorites_count': request.user.favorites.count(),
-            'favorites_added': favorites_added
+            'favorites_count': Favorite.objects.filter(user=request.user).count(),
+            'favorites_added': len(new_ids)
         })
 
     except Exception as e:
@@ -349,8 +319,9 @@ def ajax_clear_session_favorites(request):
     if request.method == 'POST':
         try:
             # Clear session favorites
-            request.session['favorites'] = []
-            request.session.modified = True
+            clear_guest_favorites(request.session.session_key)
+            if 'favorites' in request.session:
+                del request.session['favorites']
             print("🗑️ Session favorites cleared")
             
             return JsonResponse({
@@ -364,3 +335,27 @@ def ajax_clear_session_favorites(request):
             })
     
     return JsonResponse({'success': False, 'message': 'Invalid request'})
+
+
+@never_cache
+@require_GET
+def ajax_header_counts(request):
+    """Cart/favorites counters and a fresh CSRF token for cached guest pages"""
+    cart_total = 0
+    if request.user.is_authenticated:
+        cart = Cart.objects.filter(user=request.user).first()
+        favorites_count = Favorite.objects.filter(user=request.user).count()
+    else:
+        cart = None
+        if request.session.session_key:
+            cart = Cart.objects.filter(session_key=request.session.session_key, user=None).first()
+        favorites_count = get_guest_favorites_count(request.session.session_key)
+
+    if cart:
+        cart_total = cart.total_items
+
+    return JsonResponse({
+        'cart_total': cart_total,
+        'favorites_count': favorites_count,
+        'csrf_token': get_token(request),
+    })
@@ -1,18 +1,21 @@
 
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Count, Avg, F, Func
+from django.db.models import Q, Count, Avg, F, Func, Prefetch, Exists, OuterRef, Subquery, IntegerField, FloatField
+from django.db.models.functions import Coalesce
 from django.core.paginator import Paginator
 from functools import wraps
 from django.contrib import messages
 
 
 from store.models import (
-    Product, Category, Brand, CarModel, Banner,
+    Product, Category, Brand, CarModel, Banner, ProductImage,
     ProductLike, ProductComment, Favorite, Cart, CartItem,
     Order, OrderItem, UserProfile, TelegramAuth, ExchangeRate,
     PaymentSettings
 )
+from store.utils import anonymous_page_cache
+from store.seo_utils import get_product_seo
 
 
 def store_login_required(view_func):
@@ -25,6 +28,7 @@ def store_login_required(view_func):
     return _wrapped_view
 
 
+@anonymous_page_cache
 def home(request):
     """Home page view"""
     # Get banners
@@ -74,6 +78,7 @@ def profile_view(request):
     }
 
 
+@anonymous_page_cache
 def product_list(request):
     """Product list view with filtering and search"""
     products = Product.objects.filter(is_active=True)
@@ -199,62 +204,125 @@ def advanced_search(products, query, current_lang='uz'):
 
 
 
+@anonymous_page_cache
 def product_detail(request, slug):
     """Product detail view"""
-    product = get_object_or_404(Product, slug=slug, is_active=True)
+    if request.method == 'POST':
+        product = get_object_or_404(Product, slug=slug, is_active=True)
+        return _post_product_comment(request, product)
+
+    # Template ishlatadigan hamma narsa bitta so'rovlar to'plamida yuklanadi
+    products = (Product.objects
+                .filter(is_active=True)
+                .select_related('category')
+                .prefetch_related(
+                    Prefetch('images', queryset=ProductImage.objects.order_by('-is_primary', 'created_at')),
+                    Prefetch('compatible_models', queryset=CarModel.objects.select_related('brand')),
+                    Prefetch(
+                        'comments',
+                        queryset=ProductComment.objects
+                        .filter(is_approved=True, parent__isnull=True)
+                        .select_related('user')
+                        .prefetch_related(
+                            Prefetch('replies', queryset=ProductComment.objects
+                                     .select_related('user')
+                                     .order_by('-created_at'))
+                        )
+                        .order_by('-created_at')[:4],
+                        to_attr='top_comments'
+                    ),
+                )
+                .annotate(
+                    likes_total=_count_subquery(ProductLike.objects.all()),
+                    comments_total=_count_subquery(ProductComment.objects.filter(is_approved=True)),
+                    ratings_total=_count_subquery(
+                        ProductComment.objects.filter(is_approved=True, rating__isnull=False)
+                    ),
+                    rating_avg=_avg_subquery(
+                        ProductComment.objects.filter(is_approved=True, rating__isnull=False), 'rating'
+                    ),
+                    in_carts_total=_count_subquery(
+                        CartItem.objects.filter(cart__user__isnull=False), field='cart__user'
+                    ),
+                ))
+
+    if request.user.is_authenticated:
+        products = products.annotate(
+            user_liked=Exists(ProductLike.objects.filter(user=request.user, product=OuterRef('pk'))),
+            user_favorited=Exists(Favorite.objects.filter(user=request.user, product=OuterRef('pk'))),
+        )
+
+    product = get_object_or_404(products, slug=slug)
     # Get related products
     related_products = Product.objects.filter(
         category=product.category, is_active=True
     ).exclude(pk=product.pk)[:8]
-    # Get comments
-    comments = ProductComment.objects.filter(
-        product=product, is_approved=True, parent__isnull=True
-    ).order_by('-created_at')[:4]
     # Get categories
     categories = Category.objects.filter(is_active=True)[:4]  # prefetch_related olib tashlandi
-    # Check if user has liked this product
-    user_liked = False
-    user_favorited = False
-    if request.user.is_authenticated:
-        user_liked = ProductLike.objects.filter(user=request.user, product=product).exists()
-        user_favorited = Favorite.objects.filter(user=request.user, product=product).exists()
-
-    if request.method == 'POST':
-        if not request.user.is_authenticated:
-            messages.error(request, "Koment yozish uchun tizimga kirishingiz kerak!")
-            return redirect('login')
-        rating = request.POST.get('rating')
-        comment_text = request.POST.get('comment')
-        if rating and comment_text:
-            try:
-                rating = int(rating)
-                if rating < 1 or rating > 5:
-                    messages.error(request, "Reyting 1 dan 5 gacha bo‘lishi kerak!")
-                    return redirect('product_detail', slug=product.slug)
-                ProductComment.objects.create(
-                    product=product,
-                    user=request.user,
-                    rating=rating,
-                    comment=comment_text,
-                    is_approved=True
-                )
-                messages.success(request, "Koment muvaffaqiyatli yuborildi!")
-            except ValueError:
-                messages.error(request, "Noto‘g‘ri reyting formati!")
-        else:
-            messages.error(request, "Reyting va koment kiritish shart!")
-        return redirect('product_detail', slug=product.slug)
 
     context = {
         'product': product,
         'related_products': related_products,
-        'comments': comments,
-        'user_liked': user_liked,
-        'user_favorited': user_favorited,
+        'comments': product.top_comments,
+        'user_liked': getattr(product, 'user_liked', False),
+        'user_favorited': getattr(product, 'user_favorited', False),
         'categories': categories,
+        'seo': get_product_seo(product),
     }
     return render(request, 'store/product_detail.html', context)
 
+
+def _count_subquery(queryset, field='pk'):
+    """Correlated COUNT(DISTINCT field) over ``queryset`` for the outer product"""
+    counts = (queryset
+              .filter(product=OuterRef('pk'))
+              .order_by()
+              .values('product')
+              .annotate(total=Count(field, distinct=True))
+              .values('total'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def _avg_subquery(queryset, field):
+    """Correlated AVG(field) over ``queryset`` for the outer product, NULL when empty"""
+    averages = (queryset
+                .filter(product=OuterRef('pk'))
+                .order_by()
+                .values('product')
+                .annotate(average=Avg(field))
+                .values('average'))
+    return Subquery(averages, output_field=FloatField())
+
+
+def _post_product_comment(request, product):
+    """Handle the review form posted from the product detail page"""
+    if not request.user.is_authenticated:
+        messages.error(request, "Koment yozish uchun tizimga kirishingiz kerak!")
+        return redirect('login')
+    rating = request.POST.get('rating')
+    comment_text = request.POST.get('comment')
+    if rating and comment_text:
+        try:
+            rating = int(rating)
+            if rating < 1 or rating > 5:
+                messages.error(request, "Reyting 1 dan 5 gacha bo‘lishi kerak!")
+                return redirect('product_detail', slug=product.slug)
+            ProductComment.objects.create(
+                product=product,
+                user=request.user,
+                rating=rating,
+                comment=comment_text,
+                is_approved=True
+            )
+            messages.success(request, "Koment muvaffaqiyatli yuborildi!")
+        except ValueError:
+            messages.error(request, "Noto‘g‘ri reyting formati!")
+    else:
+        messages.error(request, "Reyting va koment kiritish shart!")
+    return redirect('product_detail', slug=product.slug)
+
+
+@anonymous_page_cache
 def brands(request):
     """Brands listing page"""
     brands = Brand.objects.filter(is_active=True).order_by('name')
@@ -266,6 +334,7 @@ def brands(request):
     return render(request, 'store/brands.html', context)
 
 
+@anonymous_page_cache
 def brand_models(request, brand_slug):
     """Brand models listing page with filters and products"""
     brand = get_object_or_404(Brand, slug=brand_slug, is_active=True)
@@ -365,10 +434,10 @@ def favorites(request):
     if request.user.is_authenticated:
         favorites = Favorite.objects.filter(user=request.user).order_by('-created_at')
     else:
-        # Guest favorites from session
-        favorite_ids = request.session.get('favorites', [])
-        if favorite_ids:
-            products = Product.objects.filter(id__in=favorite_ids, is_active=True)
+        # Guest favorites stored against the session key
+        session_key = request.session.session_key
+        if session_key:
+            products = Product.objects.filter(guest_favorites__session_key=session_key, is_active=True)
             # Create fake favorite objects for template compatibility
             favorites = [type('obj', (object,), {'product': product, 'created_at': None}) for product in products]
 
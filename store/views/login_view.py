@@ -1,9 +1,11 @@
+import logging
 import secrets
 
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
 from store.models import TelegramAuth, UserProfile, Cart, CartItem, Product, Favorite, Category
+from store.utils import merge_guest_marks_to_user, merge_cart_items
 from django.contrib.auth.models import User
 import json
 from django.contrib.auth import login as auth_login
@@ -13,97 +15,38 @@ from django.shortcuts import render, redirect
 from django.contrib.auth import logout
 from django.contrib import messages
 
+logger = logging.getLogger(__name__)
 
-def cleanup_expired_telegram_auth():
-    """
-    Faqat muddati tugagan TelegramAuth yozuvlarini o'chirish
-    """
-    now = timezone.now()
-
-    # Faqat muddati tugagan yozuvlarni o'chirish
-    expired_count = TelegramAuth.objects.filter(expires_at__lt=now).count()
-    TelegramAuth.objects.filter(expires_at__lt=now).delete()
-
-    if expired_count > 0:
-        print(f"🧹 Tozalash: {expired_count} muddati tugagan yozuv o'chirildi")
-
-    return expired_count
-
-
-def merge_session_data_to_user(request, user):
-    session_key = request.session.session_key
-    print("🔄 merge_session_data_to_user ishlayapti")
-    print("Session key:", session_key)
 
+def merge_session_data_to_user(request, user, session_key=None):
+    # login() sessiya kalitini almashtiradi, shuning uchun eski kalit uzatiladi
+    session_key = session_key or request.session.session_key
     if not session_key:
-        print("❌ Sessiya mavjud emas")
         return
 
     try:
-        # Only get session cart that belongs to guest users (user=None)
-        session_cart = Cart.objects.get(session_key=session_key, user=None)
-        print("✅ Session savati topildi:", session_cart.id)
-
-        user_cart, created = Cart.objects.get_or_create(user=user)
-        print("Foydalanuvchi savati:", user_cart.id, "Yaratilganmi:", created)
-
-        # Merge cart items with better error handling
-        items_merged = 0
-        for item in session_cart.items.all():
-            try:
-                cart_item, item_created = CartItem.objects.get_or_create(
-                    cart=user_cart,
-                    product=item.product,
-                    defaults={'quantity': item.quantity}
-                )
-                if not item_created:
-                    # If item already exists, add quantities but respect stock limits
-                    new_quantity = cart_item.quantity + item.quantity
-                    if new_quantity > item.product.stock_quantity:
-                        new_quantity = item.product.stock_quantity
-                    cart_item.quantity = new_quantity
-                    cart_item.save()
-                    print(f"🔄 {item.product.name} miqdori yangilandi: {cart_item.quantity}")
-                else:
-                    print(f"✅ {item.product.name} foydalanuvchi savatiga qo'shildi")
-                items_merged += 1
-            except Exception as e:
-                print(f"❌ Xatolik: {item.product.name} ni qo'shishda xatolik: {e}")
-                continue
-
-        # Delete session cart only after successful merge
-        session_cart.delete()
-        print(f"🗑️ Session savati o'chirildi. {items_merged} ta mahsulot ko'chirildi")
-
-        # Merge favorites with better error handling
-        favorites_merged = 0
-        session_favorites = request.session.get('favorites', [])
-        for product_id in session_favorites:
-            try:
-                product = Product.objects.get(pk=product_id)
-                favorite, created = Favorite.objects.get_or_create(user=user, product=product)
-                if created:
-                    favorites_merged += 1
-                    print(f"❤️ {product.name} sevimlilarga qo'shildi")
-            except Product.DoesNotExist:
-                print(f"❌ Mahsulot topilmadi: ID {product_id}")
-                continue
-            except Exception as e:
-                print(f"❌ Xatolik: sevimlilarga qo'shishda xatolik: {e}")
-                continue
-
-        # Clear session data completely after successful merge
-        request.session['favorites'] = []
-        request.session.modified = True
-        print(f"✅ Sessiya tozalandi. {favorites_merged} ta sevimli ko'chirildi")
+        # Sevimlilar va layklar bir nechta so'rovda ko'chiriladi
+        favorites_merged = merge_guest_marks_to_user(session_key, user, request.session.pop('favorites', []))
+        request.session.pop('likes', None)
+
+        # Savat: mahsulotlar bitta so'rovda olinadi, yozuvlar bulk tarzda
+        session_items = dict(
+            CartItem.objects.filter(cart__session_key=session_key, cart__user=None)
+            .values_list('product_id', 'quantity')
+        )
+        items_added = items_updated = 0
+        if session_items:
+            user_cart, created = Cart.objects.get_or_create(user=user)
+            items_added, items_updated = merge_cart_items(user_cart, session_items)
 
-    except Cart.DoesNotExist:
-        print("❌ Session savati topilmadi")
-        # Clean up session flags anyway
-        request.session['favorites'] = []
-        request.session.modified = True
+        Cart.objects.filter(session_key=session_key, user=None).delete()
+
+        logger.info(
+            f"Sessiya {user.username} ga ko'chirildi: {favorites_merged} ta sevimli, "
+            f"{items_added} ta yangi va {items_updated} ta yangilangan savat mahsuloti"
+        )
     except Exception as e:
-        print(f"❌ Umumiy xatolik merge_session_data_to_user da: {e}")
+        logger.error(f"merge_session_data_to_user da xatolik: {e}")
         # Clean up session flags on error
         request.session['cart_initialized'] = False
         request.session.modified = True
@@ -160,13 +103,11 @@ def telegram_callback(request):
             auth.save()
 
             # Django sessionga login qilish
-            if not request.session.session_key:
-                request.session.create()
-            request.session.save()
+            guest_session_key = request.session.session_key
             auth_login(request, user)
 
             # Session ma'lumotlarini foydalanuvchiga ko'chirish
-            merge_session_data_to_user(request, user)
+            merge_session_data_to_user(request, user, guest_session_key)
 
             return redirect('home')
 
@@ -229,12 +170,10 @@ def verify_code(request):
         auth.is_used = True
         auth.save()
 
-        if not request.session.session_key:
-            request.session.create()
-        request.session.save()
+        guest_session_key = request.session.session_key
         auth_login(request, user)
 
-        merge_session_data_to_user(request, user)
+        merge_session_data_to_user(request, user, guest_session_key)
 
         # Get updated cart and favorites count after merging
         try:
@@ -257,9 +196,7 @@ def verify_code(request):
 
 
 def login_request(request):
-    # Avval eski va keraksiz yozuvlarni tozalash
-    cleanup_expired_telegram_auth()
-
+    # Muddati o'tgan yozuvlar Celery beat orqali tozalanadi (purge_expired_telegram_auth_task)
     # 6 belgi: login_a1b2c3 (jami 12 belgi)
     session_token = "login_" + secrets.token_hex(3)  # login_ + 6 hex → 12 belgi
     categories = Category.objects.filter(is_active=True)[:6]
@@ -286,7 +223,6 @@ def store_logout(request):
     # Clear session cart data before logout
     if request.session.session_key:
         request.session['cart_initialized'] = False
-        request.session['favorites'] = []
         request.session.modified = True
     
     logout(request)
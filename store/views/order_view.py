@@ -1,8 +1,9 @@
 
 from django.contrib import messages
 from django.shortcuts import render, redirect, get_object_or_404
-from store.models import Cart, Order, OrderItem, PaymentSettings, ExchangeRate, Category
-from store.utils import get_branch_by_id
+from store.models import Cart, Order, OrderItem, ExchangeRate, Category
+from store.utils import get_branch_by_id, normalize_uploaded_image, get_payment_settings
+from PIL import Image, UnidentifiedImageError
 from functools import wraps
 
 
@@ -31,7 +32,7 @@ def checkout(request):
         return redirect('cart')
 
     # Get payment settings
-    payment_settings = PaymentSettings.objects.filter(is_active=True).first()
+    payment_settings = get_payment_settings()
 
     if request.method == 'POST':
         # Create order
@@ -95,11 +96,16 @@ def order_payment(request, order_id):
     """Order payment view"""
     categories = Category.objects.filter(is_active=True)[:4]
     order = get_object_or_404(Order, order_id=order_id, user=request.user)
-    payment_settings = PaymentSettings.objects.filter(is_active=True).first()
+    payment_settings = get_payment_settings()
 
     if request.method == 'POST':
         if request.FILES.get('payment_screenshot'):
-            order.payment_screenshot = request.FILES['payment_screenshot']
+            try:
+                # Telefon rasmlari kichraytirilib, metadata siz bir marta saqlanadi
+                order.payment_screenshot = normalize_uploaded_image(request.FILES['payment_screenshot'])
+            except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+                messages.error(request, 'Please upload a valid image file.')
+                return redirect('order_payment', order_id=order.order_id)
 
             # Mahsulot sonini kamaytirish
             for order_item in order.items.all():
@@ -0,0 +1,66 @@
+import hashlib
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_safe
+
+from store.sitemaps import (
+    SITEMAP_SECTIONS, cached_stream, iter_root_sitemap, iter_urlset, sitemap_cache_key
+)
+
+SITEMAP_CONTENT_TYPE = 'application/xml; charset=utf-8'
+
+# robots.txt va tasdiqlash sahifasi brauzer va proksilarda shuncha saqlanadi
+STATIC_DOCUMENT_MAX_AGE = 60 * 60 * 24
+
+
+def static_document_view(template_name, content_type):
+    """
+    View serving a file from ``templates/`` that is read once, when the
+    URLconf is loaded. Answers conditional requests with 304 by ETag and
+    does no template rendering or database work.
+    """
+    content = (settings.BASE_DIR / 'templates' / template_name).read_bytes()
+    etag = hashlib.md5(content).hexdigest()
+
+    @require_safe
+    @condition(etag_func=lambda request: etag)
+    @cache_control(public=True, max_age=STATIC_DOCUMENT_MAX_AGE)
+    def view(request):
+        return HttpResponse(content, content_type=content_type)
+
+    return view
+
+
+robots_txt = static_document_view('robots.txt', 'text/plain; charset=utf-8')
+google_verification = static_document_view('google_verification.html', 'text/html; charset=utf-8')
+
+
+# Sitemap manzillari so'rovning Host sarlavhasidan emas, sozlamadan olinadi
+SITEMAP_BASE_URL = settings.SITE_URL.rstrip('/')
+
+
+def sitemap_index(request):
+    """sitemap.xml: bitta urlset yoki 50k dan oshsa sitemap index"""
+    chunks = cached_stream(sitemap_cache_key('root'), iter_root_sitemap(SITEMAP_BASE_URL))
+    return StreamingHttpResponse(chunks, content_type=SITEMAP_CONTENT_TYPE)
+
+
+def sitemap_section(request, section):
+    """sitemap-<section>.xml?p=N: bo'limning bitta qismi"""
+    sitemap = SITEMAP_SECTIONS.get(section)
+    if sitemap is None:
+        raise Http404('Unknown sitemap section')
+    try:
+        page = int(request.GET.get('p', 1))
+    except ValueError:
+        raise Http404('Invalid sitemap page')
+    if page < 1 or (page > 1 and page > sitemap.page_count(sitemap.count())):
+        raise Http404('Sitemap page out of range')
+
+    chunks = cached_stream(
+        sitemap_cache_key(f'{section}:{page}'),
+        iter_urlset(SITEMAP_BASE_URL, [(sitemap, page)]),
+    )
+    return StreamingHttpResponse(chunks, content_type=SITEMAP_CONTENT_TYPE)